@@ -4,7 +4,12 @@ import yaml
 import defusedxml
 
 # from .text import joke
-from .nist800_53 import NIST800_53
+from .nist800_53 import NIST800_53, NIST800_53Control
+from .nist800_53diff import diff_catalogs
+from .nist800_53deps import DependencyGraph
 from .nist800_53viz import NIST800_53Viz
 from .systemcompliance import SystemCompliance
-from .opencontrolfiles import OpenControlFiles
\ No newline at end of file
+from .opencontrolfiles import OpenControlFiles
+from .urlcache import URLCache
+from .repoarchive import RepoArchive, load_repo_archive
+from .transport import HTTPTransport
\ No newline at end of file
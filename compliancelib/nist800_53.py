@@ -40,102 +40,235 @@ import os
 import json
 import yaml
 import re
+import hashlib
+import pickle
+import tempfile
+import threading
 import defusedxml.ElementTree as ET
+from collections import OrderedDict
+from .yamlio import dump_yaml
 
 XML_FILE = os.path.join(os.path.dirname(__file__), 'data/800-53-controls.xml')
 XML_DOM = None
+# Dated releases of the 800-53 xml that can be selected with the revision
+# argument. Revision None is the current XML_FILE.
+REVISIONS = OrderedDict([
+    ('2014-07-29', os.path.join(os.path.dirname(__file__), 'data/800-53-controls.2014-07-29.xml')),
+    ('2015-02-03', os.path.join(os.path.dirname(__file__), 'data/800-53-controls.2015-02-03.xml')),
+])
+# Indexes of the most recently used revisions keyed by xml file, oldest first.
+CATALOG_INDEXES = OrderedDict()
+CATALOG_INDEXES_SIZE = 3
+CATALOG_INDEXES_LOCK = threading.Lock()
+# Pre-extracted records of each xml file are compiled next to it with a
+# .cache extension by tools/build_catalog_cache.py before packaging and
+# ignored whenever the xml changes.
+# Bump CACHE_FORMAT whenever the layout of the records changes.
+CACHE_FILE = os.path.join(os.path.dirname(__file__), 'data/800-53-controls.cache')
+CACHE_FORMAT = 3
+# Shared NIST800_53Control records keyed by xml file and id, see NIST800_53.get
+CONTROL_REGISTRY = {}
+
+try:
+    intern
+except NameError:
+    # python 3 moved intern into sys
+    from sys import intern
 
 class NIST800_53(object):
     "represent 800-53 security controls"
-    def __init__(self, id):
+    def __init__(self, id, lazy=False, revision=None):
         self.id = id
+        self.revision = revision
+        # lazy controls compute their attributes on first access
+        self.lazy = lazy
+        if lazy:
+            return
+        self._load()
+        # split description
+        self.set_description_sections()
+        self._get_control_json_dict()
+
+    def __getattr__(self, name):
+        "materialize attributes of lazy controls on first access and cache them on the instance"
+        # only called for attributes not yet set on the instance
+        if name.startswith('_') or not self.__dict__.get('lazy'):
+            raise AttributeError(name)
+        if not self.__dict__.get('_loaded'):
+            self._load()
+        if name in self.__dict__:
+            return self.__dict__[name]
+        if name in ('description_intro', 'description_sections'):
+            self.set_description_sections()
+        elif name == 'json_dict':
+            self._get_control_json_dict()
+        elif name == 'responsible':
+            self.responsible = self._get_responsible()
+        if name not in self.__dict__:
+            raise AttributeError(name)
+        return self.__dict__[name]
+
+    def _load(self):
+        "load control or control enhancement detail"
         if "(" in self.id:
             self._load_control_enhancement_from_xml()
         else:
             self._load_control_from_xml()
-        # split description
-        self.set_description_sections()
-        self._get_control_json_dict()
+        self._loaded = True
 
     @staticmethod
     def get_dom():
         # Load the XML on first use and keep it in memory in a global
-        # variable. This is perhaps not the best design.
+        # variable. This is perhaps not the best design. Control lookups
+        # read get_index() instead, which never loads the DOM.
         global XML_DOM
         if XML_DOM is None:
             XML_DOM = ET.parse(XML_FILE)
         return XML_DOM
 
     @staticmethod
-    def get_control_ids():
+    def get(id, revision=None):
+        "get the shared, immutable record of a control or control enhancement"
+        registry = CONTROL_REGISTRY.setdefault(_catalog_xml_file(revision), {})
+        record = registry.get(id)
+        if record is None:
+            record = NIST800_53Control(NIST800_53(id, revision=revision))
+            # only register ids found in the catalog so bad input cannot grow the registry
+            if id in NIST800_53.get_index(revision):
+                record = registry.setdefault(id, record)
+        return record
+
+    @staticmethod
+    def iter_catalog(revision=None):
+        "iterate shared records of all controls and control enhancements in catalog order"
+        # the index is extracted in a single pass over the xml
+        for number in NIST800_53.get_index(revision):
+            yield NIST800_53.get(number, revision)
+
+    @staticmethod
+    def get_control_ids(revision=None):
         "get a list of all control ids"
-        tree = NIST800_53.get_dom()
-        root = tree.getroot()
-        for sc in root.findall("./{http://scap.nist.gov/schema/sp800-53/feed/2.0}control"):
-            number = sc.find('{http://scap.nist.gov/schema/sp800-53/2.0}number').text.strip()
-            yield number
+        for number, record in NIST800_53.get_index(revision).items():
+            if not record['enhancement']:
+                yield number
 
     @staticmethod
-    def get_all_control_enhancement_ids():
+    def get_all_control_enhancement_ids(revision=None):
         "get a list of ALL control enhancement ids in the 800-53"
-        tree = NIST800_53.get_dom()
-        root = tree.getroot()
-        for sc in root.findall("./{http://scap.nist.gov/schema/sp800-53/feed/2.0}control/{http://scap.nist.gov/schema/sp800-53/2.0}control-enhancements/{http://scap.nist.gov/schema/sp800-53/2.0}control-enhancement"):
-            number = sc.find('{http://scap.nist.gov/schema/sp800-53/2.0}number').text.strip()
-            yield number
+        for number, record in NIST800_53.get_index(revision).items():
+            if record['enhancement']:
+                yield number
+
+    @staticmethod
+    def get_index(revision=None):
+        "get dictionary of control and control enhancement records keyed by number"
+        # Extract every control and control enhancement once per revision and
+        # keep the records of the most recently used revisions in memory so
+        # lookups by id do not rescan the XML.
+        # Use the compiled catalog cache when it matches the XML, otherwise
+        # parse the XML. Lookups never write the cache, see build_catalog_cache.
+        xml_file = _catalog_xml_file(revision)
+        with CATALOG_INDEXES_LOCK:
+            index = CATALOG_INDEXES.pop(xml_file, None)
+            if index is None:
+                index = NIST800_53.load_catalog_cache(revision=revision)
+                if index is None:
+                    index = NIST800_53._build_index_from_xml(revision)
+            # (re)insert as most recently used and evict the least recently used
+            CATALOG_INDEXES[xml_file] = index
+            while len(CATALOG_INDEXES) > CATALOG_INDEXES_SIZE:
+                evicted_xml_file = CATALOG_INDEXES.popitem(last=False)[0]
+                CONTROL_REGISTRY.pop(evicted_xml_file, None)
+        return index
+
+    @staticmethod
+    def _build_index_from_xml(revision=None):
+        "extract records of all controls and control enhancements in document order"
+        # Stream the xml and discard each control element as soon as it has
+        # been extracted so the full DOM is never held in memory.
+        index = OrderedDict()
+        root = None
+        for event, sc in ET.iterparse(_catalog_xml_file(revision), events=('start', 'end')):
+            if root is None:
+                root = sc
+            elif event == 'end' and sc.tag == '{http://scap.nist.gov/schema/sp800-53/feed/2.0}control':
+                control_record = _extract_control(sc)
+                index[control_record['number']] = control_record
+                for scen in sc.findall('{http://scap.nist.gov/schema/sp800-53/2.0}control-enhancements/{http://scap.nist.gov/schema/sp800-53/2.0}control-enhancement'):
+                    record = _extract_control_enhancement(scen, control_record)
+                    index[record['number']] = record
+                # controls are children of the root element
+                root.clear()
+        return index
+
+    @staticmethod
+    def build_catalog_cache(cache_file=None, revision=None):
+        "compile the 800-53 xml into the catalog cache file and return its path"
+        return NIST800_53._write_catalog_cache(NIST800_53._build_index_from_xml(revision), cache_file, revision)
+
+    @staticmethod
+    def load_catalog_cache(cache_file=None, revision=None):
+        "load records from the catalog cache file, or None if missing or stale"
+        xml_file = _catalog_xml_file(revision)
+        cache_file = cache_file or _catalog_cache_file(xml_file)
+        try:
+            with open(cache_file, 'rb') as f:
+                cache = pickle.load(f)
+        except Exception:
+            # missing, truncated, or written by an incompatible python
+            return None
+        if not isinstance(cache, dict) or cache.get('format') != CACHE_FORMAT:
+            return None
+        if cache.get('fingerprint') != _catalog_fingerprint(xml_file):
+            return None
+        return cache['index']
+
+    @staticmethod
+    def _write_catalog_cache(index, cache_file=None, revision=None):
+        "write records to the catalog cache file atomically"
+        xml_file = _catalog_xml_file(revision)
+        cache_file = cache_file or _catalog_cache_file(xml_file)
+        cache = {'format': CACHE_FORMAT, 'fingerprint': _catalog_fingerprint(xml_file), 'index': index}
+        # write to a temporary file and rename so concurrent readers never see a partial file
+        fd, tmp_file = tempfile.mkstemp(dir=os.path.dirname(os.path.abspath(cache_file)))
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                pickle.dump(cache, f, 2)
+            # mkstemp creates files readable only by the owner
+            os.chmod(tmp_file, 0o644)
+            os.rename(tmp_file, cache_file)
+        except:
+            os.remove(tmp_file)
+            raise
+        return cache_file
 
     def _load_control_from_xml(self):
         "load control detail from 800-53 xml using a pure python process"
-        tree = NIST800_53.get_dom()
-        root = tree.getroot()
-        # handle name spaces thusly:
-        # namespace:tag => {namespace_uri}tag
-        # example: controls:control => {http://scap.nist.gov/schema/sp800-53/feed/2.0}control
-        # find first control where number tag value equals id
-        sc = root.find("./{http://scap.nist.gov/schema/sp800-53/feed/2.0}control/[{http://scap.nist.gov/schema/sp800-53/2.0}number='%s']" % self.id)
-        if sc is not None:
-            self.family = sc.find('{http://scap.nist.gov/schema/sp800-53/2.0}family').text.strip()
-            self.number = sc.find('{http://scap.nist.gov/schema/sp800-53/2.0}number').text.strip()
-            self.title = sc.find('{http://scap.nist.gov/schema/sp800-53/2.0}title').text.strip()
+        record = NIST800_53.get_index(self.revision).get(self.id)
+        if record is not None and not record['enhancement']:
+            self.family = record['family']
+            self.number = record['number']
+            self.title = record['title']
+            self.baseline_impact = list(record['baseline_impact'])
             # test if control withdrawn
-            if (sc.find('{http://scap.nist.gov/schema/sp800-53/2.0}withdrawn') is not None):
+            if record['withdrawn']:
                 # control withdrawn
                 self.description = self.control_enhancements = self.supplemental_guidance = None
                 self.related_controls = self.priority = None
                 self.responsible = 'withdrawn'
                 return True
-            if (sc.find('{http://scap.nist.gov/schema/sp800-53/2.0}priority') is not None):
-                self.priority = sc.find('{http://scap.nist.gov/schema/sp800-53/2.0}priority').text.strip()
-            else:
-                self.priority = None
-            self.description = ''.join(sc.find('{http://scap.nist.gov/schema/sp800-53/2.0}statement').itertext())
-            self.description = re.sub(r'[ ]{2,}','',re.sub(r'^[ ]', '',re.sub(r'\n','',re.sub(r'[ ]{2,}',' ',self.description))))
-            self.description = self.description.replace(self.id, '\n').strip()
-            # determine control enhancements for control
-            if (sc.find('{http://scap.nist.gov/schema/sp800-53/2.0}control-enhancements')) is not None:
-                # control enhancements as list of ids
-                self.control_enhancements = [scen.text for scen in sc.findall('{http://scap.nist.gov/schema/sp800-53/2.0}control-enhancements/{http://scap.nist.gov/schema/sp800-53/2.0}control-enhancement/{http://scap.nist.gov/schema/sp800-53/2.0}number')]
-                # control enhancements as single block of text
-                self.control_enhancements_textblock = ''.join(sc.find('{http://scap.nist.gov/schema/sp800-53/2.0}control-enhancements').itertext())
-                self.control_enhancements_textblock = re.sub(r'[ ]{2,}','',re.sub(r'^[ ]', '',re.sub(r'[\n ]{2,}','\n',re.sub(r'[ ]{2,}',' ',self.control_enhancements_textblock))))
-                # self.control_enhancements = self.control_enhancements.replace(self.id, '\n')
+            self.priority = record['priority']
+            self.description = record['description']
+            # copy lists so changes to this object do not leak into the index
+            if record['control_enhancements'] is not None:
+                self.control_enhancements = list(record['control_enhancements'])
             else:
-                # control enhancements as list of ids if none found
                 self.control_enhancements = None
-                # control enhancements as single block of text if none found
-                self.control_enhancements_textblock = None
-            self.supplemental_guidance = None
-            # set related_controls to empty array in case there are no related controls
-            self.related_controls = []
-            related_controls = []
-            self.sg = sc.find('{http://scap.nist.gov/schema/sp800-53/2.0}supplemental-guidance')
-            if self.sg is not None:
-                sg_descr = self.sg.find('{http://scap.nist.gov/schema/sp800-53/2.0}description')
-                if sg_descr is not None:
-                    self.supplemental_guidance = sg_descr.text.strip()
-                # Get related controls listed in supplemental guidance
-                self.related_controls = [rcid.text for rcid in self.sg.findall('{http://scap.nist.gov/schema/sp800-53/2.0}related')]
-            self.responsible = self._get_responsible()
+            self.control_enhancements_textblock = record['control_enhancements_textblock']
+            self.supplemental_guidance = record['supplemental_guidance']
+            self.related_controls = list(record['related_controls'])
+            if not self.lazy:
+                self.responsible = self._get_responsible()
         else:
             self.details = json.loads('{"id": null, "error": "Failed to get security control information from 800-53 xml"}')
             self.title = self.description = self.supplemental_guidance = self.control_enhancements_textblock = self.responsible = None
@@ -144,42 +277,18 @@ class NIST800_53(object):
 
     def _load_control_enhancement_from_xml(self):
         "load control enhancement from 800-53 xml using a pure python process"
-        tree = NIST800_53.get_dom()
-        root = tree.getroot()
-        # handle name spaces thusly:
-        # namespace:tag => {namespace_uri}tag
-        # example: controls:control => {http://scap.nist.gov/schema/sp800-53/feed/2.0}control
-        # find first control where number tag value equals id
-        # sc = root.find("./{http://scap.nist.gov/schema/sp800-53/feed/2.0}control/[{http://scap.nist.gov/schema/sp800-53/2.0}number='%s']" % self.id)
-        sc = root.find("./{http://scap.nist.gov/schema/sp800-53/feed/2.0}control/{http://scap.nist.gov/schema/sp800-53/2.0}control-enhancements/{http://scap.nist.gov/schema/sp800-53/2.0}control-enhancement/[{http://scap.nist.gov/schema/sp800-53/2.0}number='%s']" % self.id)
-        if sc is not None:
-            # self.family = sc.find('{http://scap.nist.gov/schema/sp800-53/2.0}family').text
-            self.number = sc.find('{http://scap.nist.gov/schema/sp800-53/2.0}number').text.strip()
-            self.title = sc.find('{http://scap.nist.gov/schema/sp800-53/2.0}title').text.strip()
-            # self.priority = sc.find('{http://scap.nist.gov/schema/sp800-53/2.0}priority').text
-            self.description = ''.join(sc.find('{http://scap.nist.gov/schema/sp800-53/2.0}statement').itertext())
-            self.description = re.sub(r'[ ]{2,}','',re.sub(r'^[ ]', '',re.sub(r'\n','',re.sub(r'[ ]{2,}',' ',self.description))))
-            self.description = self.description.replace(self.id, '\n').strip()
+        record = NIST800_53.get_index(self.revision).get(self.id)
+        if record is not None and record['enhancement']:
+            self.family = record['family']
+            self.parent = record['parent']
+            self.number = record['number']
+            self.title = record['title']
+            self.baseline_impact = list(record['baseline_impact'])
+            self.description = record['description']
             self.control_enhancements = None
             self.control_enhancements_textblock = None
-            # Some enhancements have funky XML and do not have supplemental guidance or related controls
-            # So let's get data only if attributes exist
-            if sc.find('{http://scap.nist.gov/schema/sp800-53/2.0}supplemental-guidance') is not None:
-                self.sg = sc.find('{http://scap.nist.gov/schema/sp800-53/2.0}supplemental-guidance')
-                if (self.sg.find('{http://scap.nist.gov/schema/sp800-53/2.0}description') is not None):
-                    self.supplemental_guidance = self.sg.find('{http://scap.nist.gov/schema/sp800-53/2.0}description').text.strip()
-                else:
-                    self.supplemental_guidance = None
-            else:
-                self.sg = None
-                self.supplemental_guidance = None
-            # set related_controls to empty array in case there are no related controls
-            self.related_controls = []
-            related_controls = []
-            # findall("{http://scap.nist.gov/schema/sp800-53/2.0}supplemental-guidance/{http://scap.nist.gov/schema/sp800-53/2.0}related")
-            if (self.sg is not None):
-                # Get related controls listed in supplemental guidance
-                self.related_controls = [rcid.text for rcid in self.sg.findall('{http://scap.nist.gov/schema/sp800-53/2.0}related')]
+            self.supplemental_guidance = record['supplemental_guidance']
+            self.related_controls = list(record['related_controls'])
             self.responsible = None
         else:
             self.details = json.loads('{"id": null, "error": "Failed to get security control information from 800-53 xml"}')
@@ -227,7 +336,7 @@ class NIST800_53(object):
 
     def _get_control_yaml(self):
         "produce yaml version of control detail"
-        return yaml.safe_dump(self.json_dict, allow_unicode=True, default_flow_style=False, line_break="\n",
+        return dump_yaml(self.json_dict, allow_unicode=True, default_flow_style=False, line_break="\n",
             indent=4, explicit_start=False, explicit_end=False,)
 
     def _get_control_control_masonry(self):
@@ -248,7 +357,7 @@ class NIST800_53(object):
         # c.pop("id", None)
         c.pop("responsible", None)
         c.pop("supplemental_guidance", None)
-        return yaml.safe_dump(c, allow_unicode=True, default_flow_style=False, line_break="\n",
+        return dump_yaml(c, allow_unicode=True, default_flow_style=False, line_break="\n",
             indent=4, explicit_start=False, explicit_end=False,)
 
     # utility functions
@@ -273,3 +382,149 @@ class NIST800_53(object):
             return break_trg.join(text.split(break_src))
         else:
             return text
+
+
+def _catalog_xml_file(revision):
+    "resolve a revision of the 800-53 to its xml file"
+    if revision is None:
+        return XML_FILE
+    if revision not in REVISIONS:
+        raise Exception('The 800-53 revision %s is not supported. Supported revisions: %s' % (revision, ', '.join(REVISIONS)))
+    return REVISIONS[revision]
+
+def _catalog_cache_file(xml_file):
+    "catalog cache file of an xml file"
+    if xml_file == XML_FILE:
+        return CACHE_FILE
+    return re.sub(r'\.xml$', '', xml_file) + '.cache'
+
+def _catalog_fingerprint(xml_file):
+    "identify a revision of the 800-53 xml by its publication date and content hash"
+    with open(xml_file, 'rb') as f:
+        content = f.read()
+    m = re.search(br'pub_date="([^"]*)"', content[:2048])
+    pub_date = m.group(1).decode('utf-8') if m else None
+    return (pub_date, hashlib.sha1(content).hexdigest())
+
+def _clean_statement(sc, number):
+    "flatten the statement of a control or control enhancement into description text"
+    description = ''.join(sc.find('{http://scap.nist.gov/schema/sp800-53/2.0}statement').itertext())
+    description = re.sub(r'[ ]{2,}','',re.sub(r'^[ ]', '',re.sub(r'\n','',re.sub(r'[ ]{2,}',' ',description))))
+    return description.replace(number, '\n').strip()
+
+def _extract_supplemental_guidance(sc):
+    "return supplemental guidance text and list of related controls of an element"
+    supplemental_guidance = None
+    related_controls = []
+    # Some enhancements have funky XML and do not have supplemental guidance or related controls
+    # So let's get data only if attributes exist
+    sg = sc.find('{http://scap.nist.gov/schema/sp800-53/2.0}supplemental-guidance')
+    if sg is not None:
+        sg_descr = sg.find('{http://scap.nist.gov/schema/sp800-53/2.0}description')
+        if sg_descr is not None:
+            supplemental_guidance = sg_descr.text.strip()
+        # Get related controls listed in supplemental guidance
+        related_controls = [rcid.text for rcid in sg.findall('{http://scap.nist.gov/schema/sp800-53/2.0}related')]
+    return supplemental_guidance, related_controls
+
+def _extract_baseline_impact(sc):
+    "list baselines (LOW, MODERATE, HIGH) an element is part of"
+    return [bi.text.strip() for bi in sc.findall('{http://scap.nist.gov/schema/sp800-53/2.0}baseline-impact')]
+
+def _extract_control(sc):
+    "extract record of control detail from a control element"
+    # handle name spaces thusly:
+    # namespace:tag => {namespace_uri}tag
+    # example: controls:control => {http://scap.nist.gov/schema/sp800-53/feed/2.0}control
+    record = {'enhancement': False}
+    record['family'] = sc.find('{http://scap.nist.gov/schema/sp800-53/2.0}family').text.strip()
+    record['number'] = sc.find('{http://scap.nist.gov/schema/sp800-53/2.0}number').text.strip()
+    record['title'] = sc.find('{http://scap.nist.gov/schema/sp800-53/2.0}title').text.strip()
+    record['baseline_impact'] = _extract_baseline_impact(sc)
+    # test if control withdrawn
+    record['withdrawn'] = sc.find('{http://scap.nist.gov/schema/sp800-53/2.0}withdrawn') is not None
+    if record['withdrawn']:
+        return record
+    if (sc.find('{http://scap.nist.gov/schema/sp800-53/2.0}priority') is not None):
+        record['priority'] = sc.find('{http://scap.nist.gov/schema/sp800-53/2.0}priority').text.strip()
+    else:
+        record['priority'] = None
+    record['description'] = _clean_statement(sc, record['number'])
+    # determine control enhancements for control
+    if (sc.find('{http://scap.nist.gov/schema/sp800-53/2.0}control-enhancements')) is not None:
+        # control enhancements as list of ids
+        record['control_enhancements'] = [scen.text for scen in sc.findall('{http://scap.nist.gov/schema/sp800-53/2.0}control-enhancements/{http://scap.nist.gov/schema/sp800-53/2.0}control-enhancement/{http://scap.nist.gov/schema/sp800-53/2.0}number')]
+        # control enhancements as single block of text
+        textblock = ''.join(sc.find('{http://scap.nist.gov/schema/sp800-53/2.0}control-enhancements').itertext())
+        record['control_enhancements_textblock'] = re.sub(r'[ ]{2,}','',re.sub(r'^[ ]', '',re.sub(r'[\n ]{2,}','\n',re.sub(r'[ ]{2,}',' ',textblock))))
+    else:
+        # control enhancements as list of ids and single block of text if none found
+        record['control_enhancements'] = None
+        record['control_enhancements_textblock'] = None
+    record['supplemental_guidance'], record['related_controls'] = _extract_supplemental_guidance(sc)
+    return record
+
+def _extract_control_enhancement(sc, control_record):
+    "extract record of control enhancement detail from a control enhancement element"
+    # control enhancements inherit the family of their control
+    record = {'enhancement': True, 'parent': control_record['number'], 'family': control_record['family']}
+    record['number'] = sc.find('{http://scap.nist.gov/schema/sp800-53/2.0}number').text.strip()
+    record['title'] = sc.find('{http://scap.nist.gov/schema/sp800-53/2.0}title').text.strip()
+    record['baseline_impact'] = _extract_baseline_impact(sc)
+    record['withdrawn'] = sc.find('{http://scap.nist.gov/schema/sp800-53/2.0}withdrawn') is not None
+    record['description'] = _clean_statement(sc, record['number'])
+    record['supplemental_guidance'], record['related_controls'] = _extract_supplemental_guidance(sc)
+    return record
+
+
+class NIST800_53Control(object):
+    "immutable record of an 800-53 security control shared across the process"
+    __slots__ = ('id', 'revision', 'number', 'parent', 'family', 'title', 'priority', 'description',
+        'description_intro', 'description_sections', 'control_enhancements',
+        'control_enhancements_textblock', 'supplemental_guidance', 'related_controls',
+        'baseline_impact', 'responsible')
+
+    def __init__(self, control):
+        "copy detail from a NIST800_53 object, using tuples for lists and interning short strings"
+        for name in ('id', 'revision', 'number', 'parent', 'family', 'priority', 'responsible'):
+            object.__setattr__(self, name, _intern(getattr(control, name, None)))
+        for name in ('title', 'description', 'description_intro', 'control_enhancements_textblock', 'supplemental_guidance'):
+            object.__setattr__(self, name, getattr(control, name, None))
+        if control.description_sections is not None:
+            object.__setattr__(self, 'description_sections', tuple(control.description_sections))
+        else:
+            object.__setattr__(self, 'description_sections', None)
+        for name in ('control_enhancements', 'related_controls', 'baseline_impact'):
+            value = getattr(control, name, None)
+            if value is not None:
+                value = tuple(_intern(item) for item in value)
+            object.__setattr__(self, name, value)
+
+    def __setattr__(self, name, value):
+        raise AttributeError("NIST800_53Control records are read-only")
+
+    def __delattr__(self, name):
+        raise AttributeError("NIST800_53Control records are read-only")
+
+    def __getstate__(self):
+        return dict((name, getattr(self, name)) for name in self.__slots__)
+
+    def __setstate__(self, state):
+        for name, value in state.items():
+            object.__setattr__(self, name, value)
+
+    def __repr__(self):
+        return "<NIST800_53Control %s>" % self.id
+
+    def format(self, format):
+        "produce json, yaml or control-masonry version of control detail"
+        return NIST800_53(self.id, lazy=True, revision=self.revision).format(format)
+
+
+def _intern(value):
+    "intern strings so repeated values share memory"
+    try:
+        return intern(value)
+    except TypeError:
+        # None, or unicode on python 2
+        return value
@@ -0,0 +1,374 @@
+#!/usr/bin/python
+"""Relationships between NIST SP 800-53 security controls
+
+Loads the precursor, concurrent and successor relationships listed in the
+data/dependencies files into one compact graph with integer node ids and
+answers implementation order questions: which controls come directly
+before or after a control, which controls are implemented together, an
+implementation order of the whole catalog, and groups of controls that
+depend on each other in a cycle.
+
+Example python CLI
+------------------
+
+from compliancelib.nist800_53deps import DependencyGraph
+g = DependencyGraph.load()
+g.precursors('AU-6')
+g.successors('PM-9')
+g.concurrent('AU-6')
+order = g.topological_order()
+g.implementation_order('AU-5')
+cycles = g.strongly_connected_components(min_size=2)
+
+LICENSE
+
+ComplianceLib NIST800_53deps represents relationships between NIST SP 800-53 security controls
+Copyright (C) 2017  GovReady PBC.
+
+This program is free software: you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+
+This program is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with this program.  If not, see <http://www.gnu.org/licenses/>.
+"""
+
+__author__ = "Greg Elin (gregelin@govready.com)"
+__version__ = "$Revision: 0.1.0 $"
+__date__ = "$Date: 2017/05/20 10:00:00 $"
+__copyright__ = "Copyright (c) 2017 GovReady PBC"
+__license__ = "GNU General Public License v3 (GPLv3)"
+
+import os
+import re
+import heapq
+import threading
+from collections import OrderedDict
+
+DEPENDENCY_DIR = os.path.join(os.path.dirname(__file__), 'data/dependencies')
+
+# edge type tags
+PRECURSOR = 0
+CONCURRENT = 1
+SUCCESSOR = 2
+RELATIONSHIPS = {'precursor': PRECURSOR, 'concurrent': CONCURRENT, 'successor': SUCCESSOR,
+    # misspellings found in the dependency files
+    'pconcurrent': CONCURRENT, 'psuccessor': SUCCESSOR}
+
+CONTROL_ID = re.compile(r'^([A-Z]{2})-(\d+)(?:\s*\((\d+)\))?$')
+
+# Dependency graphs by dependency directory, loaded once per process.
+DEPENDENCY_GRAPHS = {}
+DEPENDENCY_GRAPHS_LOCK = threading.Lock()
+
+class DependencyGraph(object):
+    "precursor, concurrent and successor relationships between 800-53 controls"
+
+    def __init__(self, relationships, controls=()):
+        # relationships are (control id, edge type, control id) triples as listed,
+        # "A : precursor : B" is (A, PRECURSOR, B); controls may add controls without any
+        relationships = list(relationships)
+        ids = set(controls)
+        for control, tag, other in relationships:
+            ids.add(control)
+            ids.add(other)
+        # node ids in catalog order
+        self.ids = sorted(ids, key=control_sort_key)
+        self.index = dict((control, i) for i, control in enumerate(self.ids))
+        # tagged edges as listed, per node as sorted tuples of (node, tag)
+        edges = [set() for control in self.ids]
+        # implementation order: before[i] come directly before node i, after[i] directly after it
+        before = [set() for control in self.ids]
+        after = [set() for control in self.ids]
+        concurrent = [set() for control in self.ids]
+        for control, tag, other in relationships:
+            i, j = self.index[control], self.index[other]
+            if i == j:
+                continue
+            edges[i].add((j, tag))
+            if tag == PRECURSOR:
+                before[i].add(j)
+                after[j].add(i)
+            elif tag == SUCCESSOR:
+                after[i].add(j)
+                before[j].add(i)
+            else:
+                concurrent[i].add(j)
+                concurrent[j].add(i)
+        self.edges = [tuple(sorted(e)) for e in edges]
+        self.before = [tuple(sorted(b)) for b in before]
+        self.after = [tuple(sorted(a)) for a in after]
+        self.concurrent_nodes = [tuple(sorted(c)) for c in concurrent]
+        # precursors as listed in "A : precursor : B" lines, in listed order
+        listed = OrderedDict()
+        for control, tag, other in relationships:
+            if tag == PRECURSOR and control != other:
+                listed.setdefault(other, [])
+                precursors = listed.setdefault(control, [])
+                if other not in precursors:
+                    precursors.append(other)
+        self.listed_precursors = OrderedDict((control, tuple(precursors)) for control, precursors in listed.items())
+        # topologically sorted strongly connected components and precursor lists
+        # by control id, computed on first use
+        self.ordered_components = None
+        self.component_of = None
+        self.order_positions = None
+        self.precursor_lists = None
+        self.listed_graph = None
+
+    @staticmethod
+    def load(dep_dir=None):
+        "get the graph of the dependency files in a directory, loaded once per process"
+        dep_dir = os.path.abspath(dep_dir or DEPENDENCY_DIR)
+        with DEPENDENCY_GRAPHS_LOCK:
+            if dep_dir not in DEPENDENCY_GRAPHS:
+                DEPENDENCY_GRAPHS[dep_dir] = DependencyGraph(read_dependency_files(dep_dir))
+            return DEPENDENCY_GRAPHS[dep_dir]
+
+    @staticmethod
+    def from_precursor_dict(precursors):
+        "build a graph from a dictionary mapping controls to lists of their precursors"
+        return DependencyGraph(((control, PRECURSOR, other) for control, others in precursors.items() for other in others),
+            precursors)
+
+    def __contains__(self, control):
+        return control in self.index
+
+    def __len__(self):
+        return len(self.ids)
+
+    def relationships(self, control, tag=None):
+        "controls related to a control as listed in the dependency files, optionally of one edge type"
+        if control not in self.index:
+            return []
+        return [self.ids[j] for j, t in self.edges[self.index[control]] if tag is None or t == tag]
+
+    def precursors(self, control):
+        "controls implemented directly before a control"
+        return self._controls(self.before, control)
+
+    def successors(self, control):
+        "controls implemented directly after a control"
+        return self._controls(self.after, control)
+
+    def concurrent(self, control):
+        "controls implemented together with a control"
+        return self._controls(self.concurrent_nodes, control)
+
+    def precursor_dict(self):
+        "map each control to a tuple of the controls implemented directly before it, computed once and shared"
+        # from precursor and successor relationships
+        if self.precursor_lists is None:
+            self.precursor_lists = dict((control, tuple(self.precursors(control))) for control in self.ids)
+        return self.precursor_lists
+
+    def listed_precursor_dict(self):
+        "map controls to a tuple of the precursors listed for them, in listed order, shared"
+        # precursor relationships only, as NIST800_53Viz.dep_dict has always been
+        return self.listed_precursors
+
+    def listed_precursor_graph(self):
+        "graph of the listed precursor relationships only, built once"
+        if self.listed_graph is None:
+            self.listed_graph = DependencyGraph.from_precursor_dict(self.listed_precursors)
+        return self.listed_graph
+
+    def concurrent_sets(self):
+        "groups of controls connected by concurrent relationships, in catalog order"
+        groups = []
+        seen = set()
+        for i in range(len(self.ids)):
+            if i in seen or not self.concurrent_nodes[i]:
+                continue
+            group = []
+            stack = [i]
+            seen.add(i)
+            while stack:
+                n = stack.pop()
+                group.append(n)
+                for m in self.concurrent_nodes[n]:
+                    if m not in seen:
+                        seen.add(m)
+                        stack.append(m)
+            groups.append([self.ids[n] for n in sorted(group)])
+        return groups
+
+    def strongly_connected_components(self, min_size=1):
+        "groups of controls that come before each other in a cycle, precursor groups first"
+        return [[self.ids[n] for n in component] for component in self._components() if len(component) >= min_size]
+
+    def topological_order(self):
+        "all controls ordered so precursors come before the controls that need them"
+        # Controls in a cycle cannot be ordered among themselves and are listed
+        # together in catalog order. Ties are broken in catalog order.
+        return [self.ids[n] for component in self._components() for n in component]
+
+    def implementation_order(self, control):
+        "a control and every control implemented before it, precursors first and the control last"
+        if control not in self.index:
+            return []
+        i = self.index[control]
+        ancestors = set([i])
+        stack = [i]
+        while stack:
+            for j in self.before[stack.pop()]:
+                if j not in ancestors:
+                    ancestors.add(j)
+                    stack.append(j)
+        ancestors.remove(i)
+        self._components()
+        # the control is in the last component of its ancestors, so it can go last
+        return [self.ids[n] for n in sorted(ancestors, key=self.order_positions.__getitem__)] + [control]
+
+    def component(self, control):
+        "controls in a cycle with a control, in catalog order, or the control alone"
+        if control not in self.index:
+            return []
+        self._components()
+        return [self.ids[n] for n in self.ordered_components[self.component_of[self.index[control]]]]
+
+    def _controls(self, adjacency, control):
+        if control not in self.index:
+            return []
+        return [self.ids[j] for j in adjacency[self.index[control]]]
+
+    def _components(self):
+        "strongly connected components of the implementation order, topologically sorted"
+        if self.ordered_components is None:
+            ordered = self._sort_components()
+            component_of = [None] * len(self.ids)
+            positions = [None] * len(self.ids)
+            position = 0
+            for c, component in enumerate(ordered):
+                for n in component:
+                    component_of[n] = c
+                    positions[n] = position
+                    position += 1
+            self.component_of = component_of
+            self.order_positions = positions
+            self.ordered_components = ordered
+        return self.ordered_components
+
+    def _sort_components(self):
+        component_of, components = _tarjan(self.after)
+        # Kahn's algorithm on the condensed graph, smallest node id first
+        successors = [set() for component in components]
+        indegree = [0] * len(components)
+        for i, targets in enumerate(self.after):
+            for j in targets:
+                a, b = component_of[i], component_of[j]
+                if a != b and b not in successors[a]:
+                    successors[a].add(b)
+                    indegree[b] += 1
+        heap = [(components[c][0], c) for c in range(len(components)) if indegree[c] == 0]
+        heapq.heapify(heap)
+        ordered = []
+        while heap:
+            first, c = heapq.heappop(heap)
+            ordered.append(components[c])
+            for d in successors[c]:
+                indegree[d] -= 1
+                if indegree[d] == 0:
+                    heapq.heappush(heap, (components[d][0], d))
+        return ordered
+
+
+def read_dependency_files(dep_dir=None):
+    "yield (control id, edge type, control id) of every relationship in the dependency files"
+    dep_dir = dep_dir or DEPENDENCY_DIR
+    for file_name in sorted(os.listdir(dep_dir)):
+        if not file_name.endswith(".txt"):
+            continue
+        with open(os.path.join(dep_dir, file_name)) as f:
+            for line in f:
+                for relationship in parse_dependency_line(line):
+                    yield relationship
+
+def parse_dependency_line(line):
+    "list (control id, edge type, control id) relationships of a line like 'AU-6 : precursor : AU-2, AU-3'"
+    fields = line.replace('"', '').split(':', 2)
+    if len(fields) < 3:
+        return []
+    control = normalize_control_id(fields[0])
+    relationship = fields[1].strip().lower()
+    if relationship.endswith(' controls'):
+        relationship = relationship[:-len(' controls')]
+    tag = RELATIONSHIPS.get(relationship)
+    if control is None or tag is None:
+        return []
+    # None, N/A, WITHDRAWN and "All other controls in this family" name no control
+    others = [normalize_control_id(other) for other in fields[2].split(',')]
+    return [(control, tag, other) for other in others if other is not None]
+
+def normalize_control_id(text):
+    "control id in catalog form ('IA-5 (6)'), or None if text is not a control id"
+    match = CONTROL_ID.match(text.strip())
+    if match is None:
+        return None
+    family, number, enhancement = match.groups()
+    if enhancement:
+        return "%s-%s (%s)" % (family, int(number), int(enhancement))
+    return "%s-%s" % (family, int(number))
+
+def control_sort_key(control):
+    "sort key putting control ids in catalog order, followed by other ids in text order"
+    match = CONTROL_ID.match(control)
+    if match is None:
+        return (1, str(control), 0, 0)
+    family, number, enhancement = match.groups()
+    return (0, family, int(number), int(enhancement or 0))
+
+def _tarjan(adjacency):
+    "strongly connected components of a graph, iteratively; returns (component of node, components)"
+    index = [None] * len(adjacency)
+    lowlink = [0] * len(adjacency)
+    on_stack = [False] * len(adjacency)
+    component_of = [None] * len(adjacency)
+    components = []
+    stack = []
+    counter = 0
+    for root in range(len(adjacency)):
+        if index[root] is not None:
+            continue
+        work = [(root, 0)]
+        while work:
+            node, child = work.pop()
+            if child == 0:
+                index[node] = lowlink[node] = counter
+                counter += 1
+                stack.append(node)
+                on_stack[node] = True
+            recurse = False
+            targets = adjacency[node]
+            while child < len(targets):
+                target = targets[child]
+                child += 1
+                if index[target] is None:
+                    work.append((node, child))
+                    work.append((target, 0))
+                    recurse = True
+                    break
+                if on_stack[target]:
+                    lowlink[node] = min(lowlink[node], index[target])
+            if recurse:
+                continue
+            if lowlink[node] == index[node]:
+                component = []
+                while True:
+                    member = stack.pop()
+                    on_stack[member] = False
+                    component_of[member] = len(components)
+                    component.append(member)
+                    if member == node:
+                        break
+                components.append(sorted(component))
+            if work:
+                parent = work[-1][0]
+                lowlink[parent] = min(lowlink[parent], lowlink[node])
+    return component_of, components
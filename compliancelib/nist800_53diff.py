@@ -0,0 +1,102 @@
+#!/usr/bin/python
+"""Compare revisions of the NIST SP 800-53 security control catalog
+
+Reports controls and control enhancements added, withdrawn, retitled or
+with changed text, priority, control enhancements, related controls or
+baselines between two revisions.
+
+Example python CLI
+------------------
+
+import compliancelib
+changes = compliancelib.diff_catalogs('2014-07-29', '2015-02-03')
+changes['retitled']
+# {'AC-2 (9)': ('RESTRICTIONS ON USE OF SHARED GROUPS / ACCOUNTS', 'RESTRICTIONS ON USE OF SHARED / GROUP ACCOUNTS'), ...}
+
+LICENSE
+
+ComplianceLib NIST800_53diff compares revisions of the NIST SP 800-53 security controls
+Copyright (C) 2016  GovReady PBC.
+
+This program is free software: you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+
+This program is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with this program.  If not, see <http://www.gnu.org/licenses/>.
+"""
+
+__author__ = "Greg Elin (gregelin@govready.com)"
+__version__ = "$Revision: 0.1.0 $"
+__date__ = "$Date: 2017/05/20 10:00:00 $"
+__copyright__ = "Copyright (c) 2016, 2017 GovReady PBC"
+__license__ = "GNU General Public License v3 (GPLv3)"
+
+import hashlib
+import json
+from collections import OrderedDict
+
+from .nist800_53 import NIST800_53
+
+# record fields compared between revisions
+TEXT_FIELDS = ('description', 'supplemental_guidance')
+FINGERPRINT_FIELDS = ('title', 'withdrawn', 'priority', 'description', 'supplemental_guidance',
+    'related_controls', 'baseline_impact', 'control_enhancements')
+
+def diff_catalogs(old=None, new=None):
+    "report changes between two revisions of the 800-53 catalog"
+    return _diff_indexes(NIST800_53.get_index(old), NIST800_53.get_index(new))
+
+def _diff_indexes(old_index, new_index):
+    "report changes between two catalog indexes"
+    changes = {
+        'added': [number for number in new_index if number not in old_index],
+        'removed': [number for number in old_index if number not in new_index],
+        'withdrawn': [],
+        'retitled': OrderedDict(),
+        'text_changed': OrderedDict(),
+        'priority_changed': OrderedDict(),
+        'control_enhancements_changed': OrderedDict(),
+        'related_controls_changed': OrderedDict(),
+        'baselines_changed': OrderedDict(),
+    }
+    for number, new_record in new_index.items():
+        old_record = old_index.get(number)
+        # only records whose fingerprints differ need a field by field comparison
+        if old_record is None or fingerprint(old_record) == fingerprint(new_record):
+            continue
+        if new_record['withdrawn'] and not old_record['withdrawn']:
+            changes['withdrawn'].append(number)
+        if old_record['title'] != new_record['title']:
+            changes['retitled'][number] = (old_record['title'], new_record['title'])
+        text_changed = [field for field in TEXT_FIELDS if old_record.get(field) != new_record.get(field)]
+        if text_changed:
+            changes['text_changed'][number] = text_changed
+        if old_record.get('priority') != new_record.get('priority'):
+            changes['priority_changed'][number] = (old_record.get('priority'), new_record.get('priority'))
+        old_enhancements = old_record.get('control_enhancements') or []
+        new_enhancements = new_record.get('control_enhancements') or []
+        if old_enhancements != new_enhancements:
+            changes['control_enhancements_changed'][number] = {
+                'added': [e for e in new_enhancements if e not in old_enhancements],
+                'removed': [e for e in old_enhancements if e not in new_enhancements]}
+        old_related = set(old_record.get('related_controls') or [])
+        new_related = set(new_record.get('related_controls') or [])
+        if old_related != new_related:
+            changes['related_controls_changed'][number] = {
+                'added': sorted(new_related - old_related),
+                'removed': sorted(old_related - new_related)}
+        if old_record['baseline_impact'] != new_record['baseline_impact']:
+            changes['baselines_changed'][number] = (old_record['baseline_impact'], new_record['baseline_impact'])
+    return changes
+
+def fingerprint(record):
+    "hash the compared fields of a control or control enhancement record"
+    fields = [record.get(field) for field in FINGERPRINT_FIELDS]
+    return hashlib.sha1(json.dumps(fields, sort_keys=True).encode('utf-8')).hexdigest()
@@ -39,9 +39,37 @@ import graphviz as gv
 
 # sys.path.append(os.path.join('lib'))
 # sys.path.append(os.path.join('data'))
-from .nist800_53 import NIST800_53
+from .nist800_53 import NIST800_53, XML_FILE
+from .nist800_53deps import DependencyGraph, control_sort_key
 
+import json
+import stat
+import hashlib
+import tempfile
 import functools
+from collections import OrderedDict
+
+try:
+    string_types = basestring
+except NameError:
+    # python 3 has only str
+    string_types = str
+
+# Memoized precursor lists by (dependency directory, control id), shared by
+# all NIST800_53Viz objects and must not be modified.
+PRECURSOR_LISTS = {}
+# hashes of the dependency files and catalog by dependency directory, keying rendered graphs
+DEPENDENCY_DATA_HASHES = {}
+
+# graphviz options of every control node, and by responsibility for the control
+NODE_OPTIONS = {'shape': 'egg', 'fontname': 'arial', 'fontsize': '12'}
+RESPONSIBLE_NODE_OPTIONS = {
+    'organization': {'color': 'cornflowerblue', 'fontcolor': 'cornflowerblue'},
+    'information system': {'color': 'palevioletred', 'fontcolor': 'palevioletred'},
+    'withdrawn': {'color': 'gray', 'fontcolor': 'gray'},
+    # responsibility not stated in the control description
+    None: {'color': 'black', 'fontcolor': 'black'},
+}
 
 class NIST800_53Viz(object):
     "visualize 800-53 security controls"
@@ -64,62 +92,50 @@ class NIST800_53Viz(object):
         # Change these for a given run
         self.input_path = self.base_path + self.dep_dir
         self.output_path = self.base_path + self.out_dir
+        # rendered graphs by control set, format, size and dependency data, per user
+        self.graph_cache_dir = default_graph_cache_dir()
 
-        # load graph
-        self.dep_dict = self._load_graph_from_dependency_files()
+        # load graph, read once per process and copied for this object
+        self.dep_dict = self.dependency_graph()
 
         # load other 
         self.resolved = []
-        self.nodes = []
+        # cycles found by dep_resolve, each a list of nodes
+        self.cycles = []
+        self.nodes = list(self.precursors(self.id))
         self.edges = []
 
         # resolve precursors
-        self.precursor_list(self.dep_dict, self.id, self.nodes)
         self.precursor_controls = self.nodes
 
+    def dependency_graph(self):
+        "get the precursors listed for each control in the dependency files, a copy of the graph loaded once per process"
+        return self._load_graph_from_dependency_files()
+
     def _load_graph_from_dependency_files(self):
         "load graph from reading dependency files"
-        # # read list of files
-        files = os.listdir(self.input_path)
-        # print files
-
-        dep_dict = {}
-
-        for file in files:
-            if file.endswith(".txt"):
-                lines = self.read_file_into_array(self.input_path+file, "\n")
-                # reset question_id and text_buffer to blank, index 0 holds matched codes
-                text_buffer = ["0-0"]
-                # print "\n=============="
-                # print file
-                # print lines[0:2]
-                # print ""
-                for line in lines:
-                    dep_list = line.split(" : ")
-                    # print dep_list
-
-                    # optionally filter for relationship 
-                    if dep_list[1] == 'precursor':
-                        for control in dep_list[2].split(","):
-                            d = dep_list[0].strip()
-                            r = dep_list[1].strip()
-                            u = control.strip()
-                            # print '"%s", "%s", "%s"' % (u, r, d)
-
-                            if u not in list(dep_dict.keys()):
-                                dep_dict[u] = []
-                            
-                            if u == "None":
-                                continue
-                            # print '"%s" -> "%s"' % (u, d)
-
-                            if d in list(dep_dict.keys()):
-                                dep_dict[d].append(u)
-                            else:
-                                dep_dict[d] = []
-                                dep_dict[d].append(u)
-                            # print "%s dependencies are: %s" % (d, dep_dict[d])
-        return dep_dict
+        # precursor relationships only, in listed order and with catalog ids, copied
+        # so changes to one object's graph do not reach the others
+        return OrderedDict((control, list(precursors)) for control, precursors in
+            self.relationship_graph().listed_precursor_dict().items())
+
+    def relationship_dict(self):
+        "get the precursors of each control from both precursor and successor relationships, a copy of the graph loaded once per process"
+        return dict((control, list(precursors)) for control, precursors in self.relationship_graph().precursor_dict().items())
+
+    def relationship_graph(self):
+        "get the precursor, concurrent and successor relationships of the dependency files, loaded once per process"
+        return DependencyGraph.load(self.input_path)
+
+    def precursors(self, node):
+        "get the control and its transitive precursors in depth first order, computed once per process"
+        key = (self.input_path, node)
+        nodes = PRECURSOR_LISTS.get(key)
+        if nodes is None:
+            resolved = []
+            self.precursor_list(self.relationship_graph().listed_precursor_dict(), node, resolved)
+            nodes = PRECURSOR_LISTS.setdefault(key, tuple(resolved))
+        return nodes
 
     def read_file_into_array(self, file, delimiter="\n"):
         """Returns contents of file in array split on the splitter text
@@ -176,27 +192,28 @@ class NIST800_53Viz(object):
 
     def node_options_by_id(self, node):
         """ return options for single node id """
-        # Pass in options to method
-        options = {}
-        sc = NIST800_53(node)
-        sc_title = sc.title
-        options['label'] = "%s\n%s" % (node, sc_title.title())
-        options['shape'] = "egg"
-        options['fontname'] = "arial"
-        options['fontsize'] = "12"
-        # options['fontcolor'] = "blue"
-        # tooltip and clickable URL links (svg)
-        options['tooltip'] = "(%s) %s" % (node, sc.title.title())
-        options['URL'] = "/control?id=%s" % sc.id
-        # color code by responsibility
-        options['fontcolor'] = {'organization': 'cornflowerblue', 'information system': 'palevioletred', 'withdrawn': 'gray'}[sc.responsible]
-        options['color'] = {'organization': 'cornflowerblue', 'information system': 'palevioletred', 'withdrawn': 'gray'}[sc.responsible]
-        return options
+        return self.node_options(NIST800_53.get(node))
 
     def node_options_tuples(self, nodes):
         """ convert simple array of nodes to node tuples having options """
-        tup = tuple((node, self.node_options_by_id(node)) for node in nodes)
-        return list(tup)
+        # shared catalog records carry title and responsibility, so styling
+        # nodes does not build a NIST800_53 object per node
+        return [(node, self.node_options(NIST800_53.get(node))) for node in nodes]
+
+    def node_options(self, sc):
+        """ return options for the catalog record of a node """
+        options = dict(NODE_OPTIONS)
+        if sc.title is None:
+            # dependency files name a few ids not in the catalog
+            options['label'] = options['tooltip'] = sc.id
+        else:
+            options['label'] = "%s\n%s" % (sc.id, sc.title.title())
+            # tooltip and clickable URL links (svg)
+            options['tooltip'] = "(%s) %s" % (sc.id, sc.title.title())
+        options['URL'] = "/control?id=%s" % sc.id
+        # color code by responsibility
+        options.update(RESPONSIBLE_NODE_OPTIONS.get(sc.responsible, RESPONSIBLE_NODE_OPTIONS[None]))
+        return options
 
     def showEdges(self, graph, node):
         if node in graph:
@@ -205,38 +222,70 @@ class NIST800_53Viz(object):
             print("%s not found in graph" % (node))
 
     def dep_resolve(self, graph, node, resolved):
-        """ uncertain if this algorithm is accurate, appears to miss final dependency, see unittests """
-        if node in graph:
-            # print node 
-            sc = NIST800_53(node)
-            # print "%s - %s (%s)" % (node, sc.title, sc.responsible)
-            # print "      edgees: %s" % (graph[node])
-            for edge in graph[node]:
-                if edge not in resolved:
-                    self.dep_resolve(graph, edge, resolved)
-                self.resolved.append(node)
-        else:
+        """ appends node and its precursors not yet in resolved so every control follows its precursors """
+        # Ordering and cycles come from the relationship graph: precursors follow its
+        # topological order and cycles are its strongly connected components, recorded
+        # in self.cycles. graph is self.dep_dict, a DependencyGraph or a precursor dictionary.
+        graph = self._relationship_graph_of(graph)
+        if node not in graph:
             print("%s not found in graph" % (node))
+            return resolved
+        done = set(resolved)
+        for control in graph.implementation_order(node):
+            if control not in done:
+                done.add(control)
+                resolved.append(control)
+            component = graph.component(control)
+            if len(component) > 1 and component not in self.cycles:
+                self.cycles.append(component)
+        return resolved
+
+    def resolve_all(self, nodes=None, graph=None):
+        """ map each node (default all nodes of the graph) to the list of it and its precursors in implementation order """
+        graph = self.dep_dict if graph is None else graph
+        if nodes is None:
+            nodes = graph.ids if isinstance(graph, DependencyGraph) else list(graph)
+        graph = self._relationship_graph_of(graph)
+        orders = OrderedDict()
+        for node in nodes:
+            orders[node] = self.dep_resolve(graph, node, [])
+        return orders
+
+    def _relationship_graph_of(self, graph):
+        """ DependencyGraph of the listed precursors (None), a DependencyGraph or a precursor dictionary such as self.dep_dict """
+        if graph is None:
+            return self.relationship_graph().listed_precursor_graph()
+        if isinstance(graph, DependencyGraph):
+            return graph
+        return DependencyGraph.from_precursor_dict(graph)
 
     def precursor_graph(self, graph, node, resolved):
-        # print node
-        # print "precursors: ", graph[node]
-        # print node, ": ", graph[node]
-        tup = tuple((precursor, node) for precursor in graph[node])
-        resolved.append(node)
-        if len(list(tup)) > 0:
-            print(list(tup))
-        for precursor in graph[node]:
-            if precursor not in resolved:
-                precursor_graph(graph, precursor, resolved)
+        """ list (precursor, node) edges of node and its precursors, appending visited nodes to resolved """
+        edges = []
+        visited = set(resolved)
+        stack = [node]
+        while stack:
+            node = stack.pop()
+            if node in visited or node not in graph:
+                continue
+            visited.add(node)
+            resolved.append(node)
+            edges.extend((precursor, node) for precursor in graph[node])
+            stack.extend(reversed(graph[node]))
+        return edges
 
     def precursor_list(self, graph, node, resolved):
-        """ recursive function to sets self.nodes to have list of precursor nodes (e.g, dependencies) """
-        if node in graph:
-            if node not in resolved:
+        """ appends node and its precursor nodes (e.g, dependencies) not yet in resolved, depth first """
+        # iterative so deep chains cannot exceed the recursion limit, with a set for visited nodes
+        visited = set(resolved)
+        stack = [node]
+        while stack:
+            node = stack.pop()
+            if node in graph and node not in visited:
+                visited.add(node)
                 resolved.append(node)
-                for precursor in graph[node]:
-                    self.precursor_list(graph, precursor, resolved)
+                # pushed in reverse so precursors are visited in listed order
+                stack.extend(reversed(graph[node]))
 
     def precursor_edges(self, graph, node, edges):
         if node in graph:
@@ -245,7 +294,101 @@ class NIST800_53Viz(object):
                 edges.append(edge)
 
 
+    def select_controls(self, controls=None):
+        """ list ids of a control, a family ("AU"), a list of controls or "*" for the whole catalog, default self.id """
+        if controls is None:
+            return [self.id]
+        if not isinstance(controls, string_types):
+            return list(controls)
+        if controls == "*" or re.match(r'^[A-Z]{2}$', controls):
+            prefix = "" if controls == "*" else controls + "-"
+            return sorted((node for node in self.dep_dict if node.startswith(prefix)), key=control_sort_key)
+        return [controls]
+
+    def graph_source(self, controls=None):
+        """ DOT source of the graph of controls and all their precursors """
+        nodes = []
+        seen = set()
+        for control in self.select_controls(controls):
+            for node in self.precursors(control) or (control,):
+                if node not in seen:
+                    seen.add(node)
+                    nodes.append(node)
+        edges = []
+        for node in nodes:
+            self.precursor_edges(self.dep_dict, node, edges)
+        digraph = self.digraph(graph_attr={'size': "%s,%s" % (self.width, self.height)})
+        return self.add_edges(self.add_nodes(digraph, self.node_options_tuples(nodes)), edges).source
+
+    def render_graph(self, controls=None, format=None, cache_dir=None):
+        """ render the graph of controls and their precursors to a file in the graph cache, returns its path """
+        # graphviz runs only for graphs not rendered before with the same control set,
+        # format, size, dependency files and catalog; DOT needs no graphviz
+        # Graphs are served to browsers, so only files in a directory that other users
+        # cannot write to and that were written by this user are cache hits.
+        format = format or self.vizformat
+        cache_dir = cache_dir or self.graph_cache_dir
+        controls = self.select_controls(controls)
+        key = json.dumps([sorted(controls), format, self.width, self.height, self.dependency_data_hash()])
+        path = os.path.join(cache_dir, "%s.%s" % (hashlib.sha1(key.encode('utf-8')).hexdigest(), format))
+        if not os.path.isdir(cache_dir):
+            os.makedirs(cache_dir, 0o700)
+        _check_graph_cache_dir(cache_dir)
+        if _owned_file(path):
+            return path
+        source = self.graph_source(controls)
+        if format in ('dot', 'gv'):
+            content = source.encode('utf-8')
+        else:
+            content = gv.Source(source, format=format).pipe()
+        fd, tmp_file = tempfile.mkstemp(dir=cache_dir)
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                f.write(content)
+            os.rename(tmp_file, path)
+        except:
+            os.remove(tmp_file)
+            raise
+        return path
+
+    def dependency_data_hash(self):
+        """ hash of the dependency files and catalog the graphs are drawn from, computed once per process """
+        data_hash = DEPENDENCY_DATA_HASHES.get(self.input_path)
+        if data_hash is None:
+            h = hashlib.sha1()
+            for file_name in sorted(os.listdir(self.input_path)):
+                if file_name.endswith(".txt"):
+                    h.update(file_name.encode('utf-8'))
+                    with open(self.input_path + file_name, 'rb') as f:
+                        h.update(f.read())
+            with open(XML_FILE, 'rb') as f:
+                h.update(f.read())
+            data_hash = DEPENDENCY_DATA_HASHES.setdefault(self.input_path, h.hexdigest())
+        return data_hash
+
     def set_image_size(self, width, height):
         """ set graph size in inches """
         self.width = width
         self.height = height
+
+
+def default_graph_cache_dir():
+    "directory of rendered graphs, COMPLIANCELIB_GRAPH_CACHE_DIR or compliancelib/graphs in the user's cache directory"
+    if os.environ.get('COMPLIANCELIB_GRAPH_CACHE_DIR'):
+        return os.environ['COMPLIANCELIB_GRAPH_CACHE_DIR']
+    cache_home = os.environ.get('XDG_CACHE_HOME') or os.path.join(os.path.expanduser('~'), '.cache')
+    return os.path.join(cache_home, 'compliancelib', 'graphs')
+
+def _check_graph_cache_dir(cache_dir):
+    "raise unless the graph cache directory is owned by this user and not writable by others"
+    st = os.stat(cache_dir)
+    if hasattr(os, 'getuid') and (st.st_uid != os.getuid() or st.st_mode & (stat.S_IWGRP | stat.S_IWOTH)):
+        raise Exception('Graph cache directory %s must be owned by the current user and not writable by others' % cache_dir)
+
+def _owned_file(path):
+    "test if path is a regular file, not a link, owned by this user"
+    try:
+        st = os.lstat(path)
+    except OSError:
+        return False
+    return stat.S_ISREG(st.st_mode) and (not hasattr(os, 'getuid') or st.st_uid == os.getuid())
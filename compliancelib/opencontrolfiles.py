@@ -96,6 +96,8 @@ import yaml
 import re
 import sys
 import logging
+from .urlcache import fetch_url
+from .yamlio import load_yaml_cached
 
 if sys.version_info >= (3, 0):
     from urllib.parse import urlparse
@@ -121,16 +123,21 @@ class OpenControlFiles():
 
     def __init__(self):
         self.ocfiles = {}
+        # fetches made and avoided by reusing loaded files or resolved repos
+        self.fetches = 0
+        self.fetches_avoided = 0
         self.logger = logging.getLogger('opencontrolfiles')
 
     def load_ocfile_from_url(self, ocfileurl):
         "load OpenControl component YAML file from URL"
         # file must be actual YAML file
         # idempotent loading - do not load if url already loaded
-        if ocfileurl in self.ocfiles.keys():
+        if ocfileurl in self.ocfiles:
+            self.fetches_avoided += 1
             return self.ocfiles[ocfileurl]
+        self.fetches += 1
         try:
-            self.ocfiles[ocfileurl] = yaml.safe_load(urlopen(ocfileurl))
+            self.ocfiles[ocfileurl] = load_yaml_cached(fetch_url(ocfileurl))
         except:
             print("Unexpected error loading YAML file:", sys.exc_info()[0])
             self.logger.error("Unexpected error loading YAML file:", sys.exc_info()[0])
@@ -155,6 +162,9 @@ class OpenControlFiles():
            ocfile_url = "%s/%s" % (repo_url, yaml_file)
            self.logger.info("opencontrol ocfile_url is {}".format(ocfile_url))
            return ocfile_url
+        # Resolve repo read from an archive (`archive://`), see repoarchive.py
+        if repo_url.startswith('archive://'):
+            return "%s/%s" % (repo_url.rstrip('/'), yaml_file)
         # TODO: Add non-GitHub services here
         return repo_url
 
@@ -172,8 +182,8 @@ class OpenControlFiles():
                 return "%s/%s/%s" % (repo_url.replace('https://github.com/','https://raw.githubusercontent.com/'), revision, path)
             else:
                 raise Exception('Attempt to load unsupported item type service. Only "components", "standards", and "certifications" supported in this version of ComplianceLib')
-        # Resolve localfile repo (`file:///`)
-        if 'file:///' in repo_url:
+        # Resolve localfile repo (`file:///`) and repo read from an archive (`archive://`)
+        if 'file:///' in repo_url or repo_url.startswith('archive://'):
             if (item_type == "components"):
                 ocfile_url = "%s/%s/%s" % (repo_url, path, "component.yaml")
             elif (item_type == "standards"):
@@ -186,7 +196,7 @@ class OpenControlFiles():
             return ocfile_url
         # TODO: Add non-GitHub services here
         # No match of hosted type
-        raise Exception('Attempt to load unsupported repo service. Only GitHub.com and local repositories (file:///) supported in this version of ComplianceLib')
+        raise Exception('Attempt to load unsupported repo service. Only GitHub.com, local repositories (file:///) and repo archives (archive://) supported in this version of ComplianceLib')
 
     def list_items_in_repo(self, ocfileurl, item_type):
         "list paths of items found in an opencontrol.yaml file, not including any dependencies"
@@ -227,9 +237,14 @@ class OpenControlFiles():
             component_list = self.list_items_in_repo(ocfileurl, item_type)
             components_urls_list = [self.resolve_item_url(repo_ref, revision, component_url, item_type) for component_url in component_list]
             return components_urls_list
+        elif (parsed_uri.scheme == 'archive'):
+            revision = 'master'
+            repo_ref = "%s://%s" % (parsed_uri.scheme, parsed_uri.netloc)
+            component_list = self.list_items_in_repo(ocfileurl, item_type)
+            return [self.resolve_item_url(repo_ref, revision, component_url, item_type) for component_url in component_list]
         else:
             # only GitHub supported
-            raise Exception('Attempt to load unsupported repo service. Only GitHub.com and local repositories (file:///)supported in this version of ComplianceLib')
+            raise Exception('Attempt to load unsupported repo service. Only GitHub.com, local repositories (file:///) and repo archives (archive://) supported in this version of ComplianceLib')
 
     def list_dependency_items_in_repo(self, ocfileurl, item_type):
         "list paths of items found in the dependencies of an opencontrol.yaml file"
@@ -241,4 +256,57 @@ class OpenControlFiles():
             item_list = ocfile_dict['dependencies'][item_type]
         return item_list
 
-
+    def list_repo_graph_items(self, repo_url, revision, item_types, max_depth=1):
+        "list (item type, url) of items in a repo and its dependencies, loading each opencontrol.yaml once"
+        # A dependency repo is resolved once per (url, revision) and item type across
+        # the whole tree, however many repos list it. max_depth=1 follows only the
+        # dependencies of the repo itself.
+        items = []
+        seen = set()
+        for item_type in item_types:
+            for url in self.list_items_urls_in_repo(self.resolve_ocfile_url(repo_url, revision), item_type):
+                self._add_graph_item(items, seen, item_type, url)
+        self._list_dependency_graph_items(repo_url, revision, item_types, max_depth, items, seen, set())
+        self.logger.info("resolved {} items in {} with {} fetches, {} avoided".format(len(items), repo_url, self.fetches, self.fetches_avoided))
+        return items
+
+    def _list_dependency_graph_items(self, repo_url, revision, item_types, depth, items, seen, resolved):
+        "add items of the dependencies of a repo, down to depth levels"
+        if depth < 1:
+            return
+        ocfileurl = self.resolve_ocfile_url(repo_url, revision)
+        for item_type in item_types:
+            for dependency_item in self.list_dependency_items_in_repo(ocfileurl, item_type):
+                dependency_repo_url = dependency_item['url'].strip("/")
+                dependency_revision = dependency_item['revision']
+                key = (dependency_repo_url, dependency_revision, item_type)
+                if key in resolved:
+                    # listed again elsewhere in the tree
+                    self.fetches_avoided += 1
+                    continue
+                resolved.add(key)
+                dependency_ocfileurl = self.resolve_ocfile_url(dependency_repo_url, dependency_revision)
+                if (item_type == 'systems'):
+                    self._add_graph_item(items, seen, item_type, dependency_ocfileurl)
+                    # read remote item_type components
+                    for url in self.list_items_urls_in_repo(dependency_ocfileurl, "components"):
+                        self._add_graph_item(items, seen, "components", url)
+                else:
+                    # read remote item_type indicated
+                    for url in self.list_items_urls_in_repo(dependency_ocfileurl, item_type):
+                        self._add_graph_item(items, seen, item_type, url)
+                self._list_dependency_graph_items(dependency_repo_url, dependency_revision, item_types, depth - 1, items, seen, resolved)
+
+    def _add_graph_item(self, items, seen, item_type, url):
+        "append an item unless already listed"
+        if (item_type, url) in seen:
+            self.fetches_avoided += 1
+            return
+        seen.add((item_type, url))
+        items.append((item_type, url))
+
+    def fetch_info(self):
+        "report fetches of opencontrol files made and avoided"
+        return {"fetches": self.fetches,
+            "fetches_avoided": self.fetches_avoided,
+            "ocfiles": len(self.ocfiles)}
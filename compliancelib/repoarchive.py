@@ -0,0 +1,166 @@
+#!/usr/bin/python
+# -*- coding: utf-8 -*-
+"""Load OpenControl repos from a single archive
+
+Reads a whole OpenControl repo in one pass from a tarball, a zip file or a
+revision of a local git repository (with `git archive`) and serves its
+opencontrol.yaml, component.yaml, standards and certifications files from
+memory under an `archive://` repo url.
+
+Example python CLI
+------------------
+
+import compliancelib
+from compliancelib.repoarchive import load_repo_archive
+repo_url = load_repo_archive('/tmp/freedonia-compliance-master.tar.gz')
+sp = compliancelib.SystemCompliance()
+sp.load_system_from_opencontrol_repo(repo_url)
+
+# a revision of a local (bare) git repository
+repo_url = load_repo_archive('/srv/git/freedonia-compliance.git', revision='v1.0')
+
+LICENSE
+
+ComplianceLib RepoArchive is a class for loading OpenControl repos from archives
+Copyright (C) 2017  GovReady PBC.
+
+This program is free software: you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+
+This program is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with this program.  If not, see <http://www.gnu.org/licenses/>.
+"""
+
+__author__ = "Greg Elin (gregelin@govready.com)"
+__version__ = "$Revision: 0.1.0 $"
+__date__ = "$Date: 2017/05/20 10:00:00 $"
+__copyright__ = "Copyright (c) 2017 GovReady PBC"
+__license__ = "GNU General Public License v3 (GPLv3)"
+
+import os
+import io
+import sys
+import hashlib
+import posixpath
+import tarfile
+import zipfile
+import subprocess
+
+if sys.version_info >= (3, 0):
+    from urllib.parse import urlparse
+if sys.version_info < (3, 0) and sys.version_info >= (2, 5):
+    from urlparse import urlparse
+
+class RepoArchive(object):
+    "files of an OpenControl repo read from an archive and kept in memory"
+
+    def __init__(self, files, name):
+        # file contents by path relative to the directory holding opencontrol.yaml
+        self.files = files
+        self.name = name
+
+    @staticmethod
+    def from_tarball(path):
+        "read the files of a repo from a tar file, compressed or not"
+        with tarfile.open(path) as tar:
+            return RepoArchive(_repo_files(_tar_members(tar)), _archive_name(path))
+
+    @staticmethod
+    def from_zip(path):
+        "read the files of a repo from a zip file"
+        with zipfile.ZipFile(path) as archive:
+            members = [(info.filename, archive.read(info)) for info in archive.infolist() if not info.filename.endswith('/')]
+        return RepoArchive(_repo_files(members), _archive_name(path))
+
+    @staticmethod
+    def from_git(path, revision='HEAD'):
+        "read the files of a revision of a local git repository, bare or not"
+        try:
+            tar_bytes = subprocess.check_output(['git', '-C', path, 'archive', '--format=tar', revision])
+        except (OSError, subprocess.CalledProcessError) as e:
+            raise Exception('Unable to read revision %s of git repository %s: %s' % (revision, path, e))
+        with tarfile.open(fileobj=io.BytesIO(tar_bytes)) as tar:
+            return RepoArchive(_repo_files(_tar_members(tar)), _archive_name(path, revision))
+
+    def read(self, path):
+        "return the content of a file in the repo"
+        key = _normalize(path)
+        if key not in self.files:
+            raise IOError('No file %s in repo archive %s' % (path, self.name))
+        return self.files[key]
+
+    def repo_url(self):
+        "url of the repo for OpenControlFiles and SystemCompliance"
+        return "archive://%s" % self.name
+
+
+ARCHIVES = {}
+
+def register_archive(archive):
+    "serve the files of a RepoArchive under its archive:// repo url, returns the url"
+    ARCHIVES[archive.name] = archive
+    return archive.repo_url()
+
+def load_repo_archive(path, revision='HEAD'):
+    "read a repo from a tarball, zip file or local git repository and return its archive:// repo url"
+    if os.path.isdir(path):
+        archive = RepoArchive.from_git(path, revision)
+    elif zipfile.is_zipfile(path):
+        archive = RepoArchive.from_zip(path)
+    elif tarfile.is_tarfile(path):
+        archive = RepoArchive.from_tarball(path)
+    else:
+        raise Exception('Unsupported repo archive %s. Only tar and zip files and git repositories are supported' % path)
+    return register_archive(archive)
+
+def read_archive_url(url):
+    "return the content of an archive:// url"
+    parsed = urlparse(url)
+    if parsed.netloc not in ARCHIVES:
+        raise IOError('No repo archive registered for %s' % url)
+    return ARCHIVES[parsed.netloc].read(parsed.path)
+
+def _tar_members(tar):
+    "yield (path, content) of the regular files in a tar file"
+    for member in tar:
+        if member.isfile():
+            yield member.name, tar.extractfile(member).read()
+
+def _repo_files(members):
+    "key file contents by path relative to the top-most opencontrol.yaml"
+    members = [(_normalize(name), content) for name, content in members]
+    ocfiles = sorted((name.count('/'), name) for name, content in members if posixpath.basename(name) == 'opencontrol.yaml')
+    if not ocfiles:
+        raise Exception('No opencontrol.yaml file found in repo archive')
+    # archives of GitHub repos put all files in a directory named after the repo
+    root = posixpath.dirname(ocfiles[0][1])
+    prefix = root + '/' if root else ''
+    return dict((name[len(prefix):], content) for name, content in members if name.startswith(prefix))
+
+def _normalize(path):
+    "normalize a path in an archive, rejecting paths outside it"
+    path = posixpath.normpath(path.replace('\\', '/')).lstrip('/')
+    if path == '..' or path.startswith('../'):
+        raise IOError('Path %s is outside the repo archive' % path)
+    return path
+
+def _archive_name(path, revision=None):
+    "host part of the archive:// url of an archive"
+    source = os.path.abspath(path)
+    if revision is not None:
+        source += '@' + revision
+    base = os.path.basename(source.rstrip(os.sep).split('@')[0])
+    for ext in ('.tar.gz', '.tgz', '.tar.bz2', '.tar', '.zip', '.git'):
+        if base.endswith(ext):
+            base = base[:-len(ext)]
+            break
+    # host names are case insensitive and limited to letters, digits and hyphens
+    base = ''.join(c if c.isalnum() else '-' for c in base.lower()).strip('-')
+    return "%s-%s" % (base or 'repo', hashlib.sha1(source.encode('utf-8')).hexdigest()[:10])
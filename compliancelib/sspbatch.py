@@ -0,0 +1,143 @@
+#!/usr/bin/python
+# -*- coding: utf-8 -*-
+"""Render system security plans of many systems in parallel
+
+Loads each system from its OpenControl repo and writes its system security
+plan in a pool of worker processes. The 800-53 catalog index is loaded in
+the parent before the workers start, so forked workers share it
+copy-on-write; workers that are not forked load it once from the compiled
+catalog cache.
+
+Example python CLI
+------------------
+
+from compliancelib.sspbatch import render_ssps
+results = render_ssps(['/srv/repos/freedonia-compliance', '/srv/repos/cg-compliance'],
+    '/tmp/ssps', baseline='MODERATE')
+for result in results:
+    print(result['source'], result['output'], result['seconds'], result['error'])
+
+LICENSE
+
+ComplianceLib sspbatch renders system security plans of many systems
+Copyright (C) 2017  GovReady PBC.
+
+This program is free software: you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+
+This program is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with this program.  If not, see <http://www.gnu.org/licenses/>.
+"""
+
+__author__ = "Greg Elin (gregelin@govready.com)"
+__version__ = "$Revision: 0.1.0 $"
+__date__ = "$Date: 2017/05/20 10:00:00 $"
+__copyright__ = "Copyright (c) 2017 GovReady PBC"
+__license__ = "GNU General Public License v3 (GPLv3)"
+
+import os
+import io
+import re
+import sys
+import time
+import tempfile
+import traceback
+import multiprocessing
+
+from .nist800_53 import NIST800_53
+from .systemcompliance import SystemCompliance, SSP_FORMATS
+from .repoarchive import load_repo_archive
+
+# output file extension by SSP format
+SSP_EXTENSIONS = {'text': 'txt', 'json': 'json', 'yaml': 'yaml'}
+
+def render_ssps(sources, output_dir, format='text', baseline=None, control_ids=None, processes=None, revision=None):
+    "render the system security plans of systems in OpenControl repos to files, returns a result per system"
+    # Sources are local repo directories, tar or zip archives of repos, or repo
+    # urls. Each result reports the source, output file, number of controls,
+    # seconds spent loading, rendering and in total, and the error if rendering
+    # the system failed; failures do not stop the other systems.
+    if format not in SSP_FORMATS:
+        raise Exception("SSP format %s is not supported. Use one of %s" % (format, ", ".join(SSP_FORMATS)))
+    if not os.path.isdir(output_dir):
+        os.makedirs(output_dir)
+    tasks = [(source, output_file, format, baseline, control_ids, revision)
+        for source, output_file in zip(sources, _output_files(sources, output_dir, format))]
+    # load the catalog once before workers are forked
+    NIST800_53.get_index(revision)
+    if processes == 1 or len(tasks) < 2:
+        return [_render_ssp(task) for task in tasks]
+    pool = multiprocessing.Pool(processes, _init_worker, (revision,))
+    try:
+        # one system per task so slow systems do not hold up others queued behind them
+        return list(pool.imap(_render_ssp, tasks, chunksize=1))
+    finally:
+        pool.close()
+        pool.join()
+
+def _init_worker(revision):
+    "load the catalog index in a worker, already present when the worker was forked"
+    NIST800_53.get_index(revision)
+
+def _render_ssp(task):
+    "load a system and write its system security plan, timing both"
+    source, output_file, format, baseline, control_ids, revision = task
+    result = {'source': source, 'output': output_file, 'controls': 0,
+        'load_seconds': None, 'render_seconds': None, 'seconds': None, 'error': None}
+    start = time.time()
+    try:
+        sp = SystemCompliance(revision=revision)
+        sp.load_system_from_opencontrol_repo(_repo_url(source), max_workers=1)
+        loaded = time.time()
+        result['load_seconds'] = loaded - start
+        # write to a temporary file renamed into place when complete, so a failed
+        # render never leaves a truncated plan under the output name
+        fd, tmp_file = tempfile.mkstemp(dir=os.path.dirname(os.path.abspath(output_file)))
+        try:
+            with io.open(fd, 'w', encoding='utf-8') as out:
+                for chunk in sp.iter_ssp(control_ids, baseline, format):
+                    out.write(chunk if not isinstance(chunk, bytes) else chunk.decode('utf-8'))
+                    result['controls'] += 1
+            # mkstemp creates files readable only by the owner
+            os.chmod(tmp_file, 0o644)
+            os.rename(tmp_file, output_file)
+        except:
+            os.remove(tmp_file)
+            raise
+        if format == 'json':
+            # opening and closing brackets
+            result['controls'] -= 2
+        result['render_seconds'] = time.time() - loaded
+    except Exception:
+        result['error'] = traceback.format_exc()
+    result['seconds'] = time.time() - start
+    return result
+
+def _repo_url(source):
+    "repo url of a local repo directory, repo archive or url"
+    if '://' in source:
+        return source
+    if os.path.isdir(source) and os.path.isfile(os.path.join(source, 'opencontrol.yaml')):
+        return "file://%s" % os.path.abspath(source)
+    return load_repo_archive(source)
+
+def _output_files(sources, output_dir, format):
+    "output file of each source, named after the repo and unique in output_dir"
+    names = []
+    for source in sources:
+        name = os.path.basename(source.rstrip('/')) or 'system'
+        name = re.sub(r'(\.tar\.gz|\.tgz|\.tar|\.zip|\.git)$', '', name)
+        name = re.sub(r'[^A-Za-z0-9_.-]', '_', name)
+        unique, i = name, 1
+        while unique in names:
+            i += 1
+            unique = "%s-%s" % (name, i)
+        names.append(unique)
+    return [os.path.join(output_dir, "%s-ssp.%s" % (name, SSP_EXTENSIONS[format])) for name in names]
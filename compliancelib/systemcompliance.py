@@ -134,8 +134,14 @@ import json
 import yaml
 import re
 import sys
+import copy
+import hashlib
+from collections import OrderedDict
+from multiprocessing.pool import ThreadPool
 from .nist800_53 import NIST800_53
 from .opencontrolfiles import OpenControlFiles
+from .urlcache import fetch_url, fetch_url_if_modified
+from .yamlio import load_yaml_cached, dump_yaml
 
 if sys.version_info >= (3, 0):
     from urllib.parse import urlparse
@@ -144,10 +150,33 @@ if sys.version_info < (3, 0) and sys.version_info >= (2, 5):
     from urlparse import urlparse
     from urllib2 import urlopen
 
+class SystemControl(object):
+    "control implementation details of a system layered over the shared catalog record of the control"
+    def __init__(self, standard_control):
+        # catalog detail such as id, title and description is read from the shared record
+        self.standard_control = standard_control
+
+    def __getattr__(self, name):
+        # only called for attributes not set on the system control itself
+        if name in ('standard_control', '_nist800_53'):
+            raise AttributeError(name)
+        if name in self.standard_control.__slots__:
+            return getattr(self.standard_control, name)
+        # json_dict, replace_line_breaks and other NIST800_53 members are
+        # read from a lazy control created on first use
+        if '_nist800_53' not in self.__dict__:
+            self._nist800_53 = NIST800_53(self.standard_control.id, lazy=True, revision=self.standard_control.revision)
+        return getattr(self._nist800_53, name)
+
+# formatter method of SystemCompliance by system security plan format
+SSP_FORMATS = OrderedDict([('text', '_ssp_text'), ('json', '_ssp_json'), ('yaml', '_ssp_yaml')])
+
 class SystemCompliance():
     "initialize SystemCompliance security controls implementation"
-    def __init__(self):
+    def __init__(self, revision=None):
         self.ocfiles = {}
+        # revision of the 800-53 catalog to describe controls with, None is current
+        self.revision = revision
         # define the dictionaries we will support so we avoid unexpected data
         self.supported_dictionaries = ['components', 'standards', 'certifications', 'assignments', 'roles', 'systems']
         # stub out a system
@@ -164,17 +193,60 @@ class SystemCompliance():
       self.system['systems'] = {}
       self.system['assignments'] = {}
       self.system['roles'] = {}
+      # satisfies entries of components by control_key and component name, see _index_component
+      self.control_index = {}
+      self._component_control_keys = {}
+      # most recently used results of control(), cleared whenever components change
+      self.control_cache = OrderedDict()
+      self.control_cache_size = 256
+      self.control_cache_hits = 0
+      self.control_cache_misses = 0
+      # fetches of opencontrol files made and avoided by the last repo load
+      self.opencontrol_fetch_info = {}
+      # repo loaded by load_system_from_opencontrol_repo as (repo_url, revision, max_depth)
+      # and name, content digest and validators of its items by (item type, url)
+      self.opencontrol_repo = None
+      self.opencontrol_items = OrderedDict()
 
     def system_component_add(self, component_name, component_dict):
       "add a component as a dictionary to the system with the component name as key"
       self.system['components'][component_name] = component_dict
+      self._index_component(component_name, component_dict)
+
+    def system_component_remove(self, component_name):
+      "remove a component and its entries in the control index from the system"
+      if component_name in self.system['components']:
+        del self.system['components'][component_name]
+        self._index_component(component_name, {})
+        del self._component_control_keys[component_name]
+
+    def _index_component(self, component_name, component_dict):
+      "index the satisfies entries of a component by control_key, replacing entries indexed for the component before"
+      entries = OrderedDict()
+      for ck in component_dict.get('satisfies') or []:
+        entries.setdefault(ck['control_key'], []).append(ck)
+      # drop entries of controls the component no longer satisfies
+      for control_key in self._component_control_keys.get(component_name, []):
+        if control_key not in entries:
+          del self.control_index[control_key][component_name]
+          if len(self.control_index[control_key]) < 1:
+            del self.control_index[control_key]
+      replaced = component_name in self._component_control_keys
+      for control_key in entries:
+        bucket = self.control_index.setdefault(control_key, OrderedDict())
+        bucket[component_name] = entries[control_key]
+        if replaced and len(bucket) > 1:
+          # keep a replaced component at its place in the system component order
+          self.control_index[control_key] = OrderedDict((name, bucket[name]) for name in self.system['components'] if name in bucket)
+      self._component_control_keys[component_name] = list(entries)
+      self.control_cache.clear()
 
     def add_component_from_url(self, oc_componentyaml_url):
       "add a component as a dictionary to the system from an OpenControl YAML file at a URL"
       # go load opencontrol file
       print("oc_componentyaml_url: ", oc_componentyaml_url)
       try:
-        my_dict = yaml.safe_load(urlopen(oc_componentyaml_url))
+        my_dict = load_yaml_cached(fetch_url(oc_componentyaml_url))
         # todo - add checks to make sure it is a proper opencontrol file
       except:
         print("Unexpected error loading YAML file:", sys.exc_info()[0])
@@ -194,7 +266,10 @@ class SystemCompliance():
       if my_dict_type in self.supported_dictionaries:
         # to do - validate dictionary
         if (my_dict and my_dict_name):
-          self.system[my_dict_type][my_dict_name] = my_dict
+          if my_dict_type == 'components':
+            self.system_component_add(my_dict_name, my_dict)
+          else:
+            self.system[my_dict_type][my_dict_name] = my_dict
       else:
         # pass or indicate error
         raise Exception('Attempt to load unsupported dictionary type %s' % my_dict_type)
@@ -202,18 +277,21 @@ class SystemCompliance():
     def add_system_dict_from_url(self, dict_type, url):
       "load a dictionary into system object from a URL"
       if dict_type in self.supported_dictionaries:
-        try:
-          my_dict = yaml.safe_load(urlopen(url))
-          # todo - validate proper opencontrol file
-        except:
-          print("Unexpected error loading YAML file:", sys.exc_info()[0])
-          my_dict = None
-          raise
+        my_dict = self._load_yaml_from_url(url)
         if (my_dict):
-          self.system[dict_type][my_dict['name']] = my_dict
+          self.add_system_dict(dict_type, my_dict['name'], my_dict)
       else:
         raise Exception('Attempt to load unsupported dictionary type %s' % dict_type)
 
+    def _load_yaml_from_url(self, url):
+      "load a dictionary from a YAML file at a URL"
+      try:
+        return load_yaml_cached(fetch_url(url))
+        # todo - validate proper opencontrol file
+      except:
+        print("Unexpected error loading YAML file:", sys.exc_info()[0])
+        raise
+
     def standards(self):
       "list the standards composing the system as array"
       return list(self.system['standards'])
@@ -244,19 +322,43 @@ class SystemCompliance():
       if len(self.components()) < 1:
         raise Exception ("No controls available. No components have been loaded.")
 
+      # repeated calls return the same control object until components change
+      key = (cid, standard, self.revision)
+      ci = self.control_cache.pop(key, None)
+      if ci is not None:
+        self.control_cache_hits += 1
+      else:
+        self.control_cache_misses += 1
+        ci = self._control(cid, standard)
+      if self.control_cache_size > 0:
+        # (re)insert as most recently used and evict the least recently used
+        self.control_cache[key] = ci
+        while len(self.control_cache) > self.control_cache_size:
+          self.control_cache.popitem(last=False)
+      return ci
+
+    def control_cache_info(self):
+      "report hits, misses and size of the control() cache"
+      return {"hits": self.control_cache_hits,
+        "misses": self.control_cache_misses,
+        "size": len(self.control_cache),
+        "maxsize": self.control_cache_size}
+
+    def _control(self, cid, standard):
+      "combine control info from standard and implementation details"
+      # the shared catalog record is never modified, system details are set on the SystemControl
       # create control object from standard (NOTE: only support NIST 800-53 currently)
       if (standard == 'NIST800_53'):
-        ci = NIST800_53(cid)
+        ci = SystemControl(NIST800_53.get(cid, self.revision))
       else:
         raise Exception ("The standard %s is not currently supported." % standard)
 
       # find all components with content regarding control_key
       # add dictionary of components attribute to control
       ci.components_dict = {}
-      for component in self.components():
-        component_control_info = [ck for ck in self.system['components'][component]['satisfies'] if ck['control_key'] == cid]
-        if (len(component_control_info)) > 0:
-          ci.components_dict[component] = component_control_info
+      for component, component_control_info in self.control_index.get(cid, {}).items():
+        # copy so changes to the control object do not leak into the index
+        ci.components_dict[component] = copy.deepcopy(component_control_info)
 
       # make it easy to look at list of components related to control by getting list of keys that are names of components
       ci.components = list(ci.components_dict)
@@ -320,45 +422,171 @@ class SystemCompliance():
 
     def control_ssp_text(self, cid):
       "print out text for a control listing in system security plan (assume NIST800-53)"
-      ci = self.control(cid)
-      print("%s - %s" % (ci.id, ci.title))
-      print("%s" % (ci.description))
-      print("\n")
-      print("responsible: %s" % ci.responsible)
-      print("roles: %s" % ci.roles)
-      print("implementation status: %s\n" % ci.implementation_status)
-      print("%s" % ci.implementation_narrative)
-
-    def load_system_from_opencontrol_repo(self, repo_url, revision='master', verbose=''):
+      sys.stdout.write(self._ssp_text(self.control(cid)))
+
+    def iter_ssp(self, control_ids=None, baseline=None, format='text', standard='NIST800_53'):
+      "yield system security plan text, json or yaml for controls one chunk per control"
+      # Controls are the given ids or all controls and control enhancements that are
+      # not withdrawn, in catalog order, optionally only those in a baseline
+      # ("LOW", "MODERATE" or "HIGH"). Control objects are built per chunk and not
+      # kept, so memory stays flat however many controls are rendered.
+      if format not in SSP_FORMATS:
+        raise Exception("SSP format %s is not supported. Use one of %s" % (format, ", ".join(SSP_FORMATS)))
+      if len(self.components()) < 1:
+        raise Exception ("No controls available. No components have been loaded.")
+      formatter = getattr(self, SSP_FORMATS[format])
+      if format == 'json':
+        yield "["
+      separator = ""
+      for cid in self._ssp_control_ids(control_ids, baseline):
+        key = (cid, standard, self.revision)
+        ci = self.control_cache[key] if key in self.control_cache else self._control(cid, standard)
+        if format == 'json':
+          yield separator + "\n" + formatter(ci)
+          separator = ","
+        else:
+          yield formatter(ci)
+      if format == 'json':
+        yield "\n]\n"
+
+    def write_ssp(self, out, control_ids=None, baseline=None, format='text', standard='NIST800_53'):
+      "write system security plan text, json or yaml for controls to a file-like object as it is rendered"
+      for chunk in self.iter_ssp(control_ids, baseline, format, standard):
+        out.write(chunk)
+
+    def _ssp_control_ids(self, control_ids, baseline):
+      "ids of controls to include in a system security plan"
+      index = NIST800_53.get_index(self.revision)
+      if control_ids is None:
+        control_ids = (number for number, record in index.items() if not record['withdrawn'])
+      for cid in control_ids:
+        if baseline is not None:
+          record = index.get(cid)
+          if record is None or baseline.upper() not in record['baseline_impact']:
+            continue
+        yield cid
+
+    def _ssp_text(self, ci):
+      "text for a control listing in system security plan"
+      return ("%s - %s\n" % (ci.id, ci.title) +
+        "%s\n" % (ci.description) +
+        "\n\n" +
+        "responsible: %s\n" % ci.responsible +
+        "roles: %s\n" % ci.roles +
+        "implementation status: %s\n\n" % ci.implementation_status +
+        "%s\n" % ci.implementation_narrative)
+
+    def _ssp_dict(self, ci):
+      "dictionary for a control listing in system security plan"
+      return OrderedDict([("id", ci.id),
+        ("title", ci.title),
+        ("description", ci.description),
+        ("responsible", ci.responsible),
+        ("roles", ci.roles),
+        ("components", ci.components),
+        ("implementation_status", ci.implementation_status),
+        ("implementation_status_details", ci.implementation_status_details),
+        ("implementation_narrative", ci.implementation_narrative)])
+
+    def _ssp_json(self, ci):
+      "json for a control listing in system security plan"
+      return json.dumps(self._ssp_dict(ci))
+
+    def _ssp_yaml(self, ci):
+      "yaml sequence item for a control listing in system security plan"
+      # OrderedDict is not a standard YAML type, dump as a plain dict
+      return dump_yaml([dict(self._ssp_dict(ci))], allow_unicode=True, default_flow_style=False, line_break="\n")
+
+    def load_system_from_opencontrol_repo(self, repo_url, revision='master', verbose='', max_workers=8, max_depth=1):
       "load system details and control implementation from a repo"
       # TODO Reset all values before loading new system
       # TODO handle not finding opencontrol.yaml file in repo
-      ocf =  OpenControlFiles()
+      # Resolve the urls of all items first, then fetch and parse them with up to
+      # max_workers threads, adding them to the system in the order they are listed.
+      # max_depth > 1 also loads dependencies of dependencies.
+      items = self.list_opencontrol_repo_items(repo_url, revision, max_depth)
+      for item_type, url in items:
+        if (verbose=='v'): print("Reading %s %s" % (item_type, url))
+      results = self._map_items(lambda item: self._fetch_item(item[1]), items, max_workers)
+      self.opencontrol_repo = (repo_url, revision, max_depth)
+      for item, (state, my_dict) in zip(items, results):
+        self.opencontrol_items[item] = state
+        if (my_dict):
+          self.add_system_dict(item[0], my_dict['name'], my_dict)
+      return True
 
-      for item_type in self.supported_dictionaries:
-        for url in ocf.list_items_urls_in_repo(ocf.resolve_ocfile_url(repo_url, revision), item_type):
-          if (verbose=='v'): print("Reading %s %s" % (item_type, url))
-          self.add_system_dict_from_url(item_type, url)
-
-      # load dependencies
-      for item_type in self.supported_dictionaries:
-        # get standards in dependencies
-        for dependency_item in ocf.list_dependency_items_in_repo(ocf.resolve_ocfile_url(repo_url, revision), item_type):
-          dependency_ocf =  OpenControlFiles()
-          dependency_repo_url = dependency_item['url']
-          dependency_revision = dependency_item['revision']
-          if (item_type == 'systems'):
-            url = dependency_ocf.resolve_ocfile_url(dependency_repo_url.strip("/"), dependency_revision)
-            self.add_system_dict_from_url(item_type, url)
-            # read remote item_type components
-            for url in dependency_ocf.list_items_urls_in_repo(dependency_ocf.resolve_ocfile_url(dependency_repo_url.strip("/"), dependency_revision), "components"):
-              # TODO test if we will end duplicating and overwriting existing key
-              self.add_system_dict_from_url("components", url)
-          else:
-            # read remote item_type indicated
-            for url in dependency_ocf.list_items_urls_in_repo(dependency_ocf.resolve_ocfile_url(dependency_repo_url.strip("/"), dependency_revision), item_type):
-              # TODO test if we will end duplicating and overwriting existing key
-              self.add_system_dict_from_url(item_type, url)
+    def refresh_system_from_opencontrol_repo(self, verbose='', max_workers=8):
+      "reload only the items of the loaded repo that were added, changed or removed since loading"
+      # Items are revalidated with their ETag/Last-Modified or compared by content
+      # digest; unchanged items are not parsed or re-added.
+      if self.opencontrol_repo is None:
+        raise Exception("No OpenControl repo loaded. Use load_system_from_opencontrol_repo first.")
+      repo_url, revision, max_depth = self.opencontrol_repo
+      items = self.list_opencontrol_repo_items(repo_url, revision, max_depth)
+      previous = self.opencontrol_items
+      results = self._map_items(lambda item: self._fetch_item(item[1], previous.get(item)), items, max_workers)
+      changes = {'added': [], 'changed': [], 'removed': [], 'unchanged': []}
+      self.opencontrol_items = OrderedDict()
+      for item, (state, my_dict) in zip(items, results):
+        self.opencontrol_items[item] = state
+        if item not in previous:
+          changes['added'].append(item)
+        elif my_dict is None and state['digest'] == previous[item]['digest']:
+          changes['unchanged'].append(item)
+        else:
+          changes['changed'].append(item)
+      changes['removed'] = [item for item in previous if item not in self.opencontrol_items]
+      # drop names no current item provides any more, then add new and changed items in order
+      names = set((item[0], state['name']) for item, state in self.opencontrol_items.items())
+      for item in changes['removed'] + changes['changed']:
+        if (item[0], previous[item]['name']) not in names:
+          if (verbose=='v'): print("Removing %s %s" % (item[0], previous[item]['name']))
+          self._remove_system_dict(item[0], previous[item]['name'])
+      for item, (state, my_dict) in zip(items, results):
+        if item in previous and item not in changes['changed']:
+          continue
+        if (verbose=='v'): print("Reading %s %s" % item)
+        if (my_dict):
+          self.add_system_dict(item[0], my_dict['name'], my_dict)
+      return changes
+
+    def _fetch_item(self, url, loaded=None):
+      "fetch and parse an item, returns (state, dictionary), the dictionary is None if unchanged since loaded"
+      content, validators = fetch_url_if_modified(url, loaded and loaded['validators'])
+      if content is None:
+        return loaded, None
+      digest = hashlib.sha1(content).hexdigest()
+      if loaded and digest == loaded['digest']:
+        return dict(loaded, validators=validators), None
+      try:
+        my_dict = load_yaml_cached(content)
+      except:
+        print("Unexpected error loading YAML file:", sys.exc_info()[0])
+        raise
+      return {'name': my_dict['name'] if my_dict else None, 'digest': digest, 'validators': validators}, my_dict
 
-      return True
+    def _map_items(self, function, items, max_workers):
+      "apply function to items with up to max_workers threads, results in the order of items"
+      if max_workers > 1 and len(items) > 1:
+        pool = ThreadPool(min(max_workers, len(items)))
+        try:
+          return pool.map(function, items)
+        finally:
+          pool.close()
+          pool.join()
+      return [function(item) for item in items]
+
+    def _remove_system_dict(self, my_dict_type, my_dict_name):
+      "remove a dictionary from system object"
+      if my_dict_type == 'components':
+        self.system_component_remove(my_dict_name)
+      else:
+        self.system[my_dict_type].pop(my_dict_name, None)
 
+    def list_opencontrol_repo_items(self, repo_url, revision='master', max_depth=1):
+      "list (item type, url) of items a repo and its dependencies add to the system, in loading order"
+      # one OpenControlFiles shared across the dependency tree loads each opencontrol.yaml once
+      ocf =  OpenControlFiles()
+      items = ocf.list_repo_graph_items(repo_url, revision, self.supported_dictionaries, max_depth)
+      self.opencontrol_fetch_info = ocf.fetch_info()
+      return items
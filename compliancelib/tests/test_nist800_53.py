@@ -25,6 +25,9 @@ import compliancelib
 import os
 import json
 import yaml
+import pickle
+import shutil
+import tempfile
 
 # sys.path.append(os.path.join('lib'))
 # sys.path.append(os.path.join('data'))
@@ -41,6 +44,81 @@ class NIST800_53Test(TestCase):
     def test_get_all_control_enhancement_ids(self):
         self.assertEqual(len(list(NIST800_53.get_all_control_enhancement_ids())), 666)
 
+    def test_get_index(self):
+        index = NIST800_53.get_index()
+        self.assertEqual(len(index), 256 + 666)
+        self.assertTrue(index['AU-3']['title'] == "CONTENT OF AUDIT RECORDS")
+        self.assertTrue(index['AU-3 (1)']['enhancement'])
+        # index is built once and shared
+        self.assertTrue(NIST800_53.get_index() is index)
+
+    def test_build_index_without_dom(self):
+        xml_dom = compliancelib.nist800_53.XML_DOM
+        compliancelib.nist800_53.XML_DOM = None
+        try:
+            index = NIST800_53._build_index_from_xml()
+            # records are streamed from the xml without keeping the DOM
+            self.assertTrue(compliancelib.nist800_53.XML_DOM is None)
+            self.assertTrue(index == NIST800_53.get_index())
+        finally:
+            compliancelib.nist800_53.XML_DOM = xml_dom
+
+    def test_catalog_cache(self):
+        tmp_dir = tempfile.mkdtemp()
+        try:
+            cache_file = os.path.join(tmp_dir, '800-53-controls.cache')
+            self.assertTrue(NIST800_53.load_catalog_cache(cache_file) is None)
+            self.assertTrue(NIST800_53.build_catalog_cache(cache_file) == cache_file)
+            index = NIST800_53.load_catalog_cache(cache_file)
+            self.assertTrue(index == NIST800_53.get_index())
+            self.assertTrue(list(index)[0:3] == ['AC-1', 'AC-2', 'AC-2 (1)'])
+            # a cache compiled from a different xml is stale and ignored
+            with open(cache_file, 'rb') as f:
+                cache = pickle.load(f)
+            cache['fingerprint'] = ('2014-07-29T16:28:52.538-04:00', 'abc123')
+            with open(cache_file, 'wb') as f:
+                pickle.dump(cache, f, 2)
+            self.assertTrue(NIST800_53.load_catalog_cache(cache_file) is None)
+        finally:
+            shutil.rmtree(tmp_dir)
+
+    def test_get_index_does_not_write_cache(self):
+        xml_file = compliancelib.nist800_53.REVISIONS['2014-07-29']
+        cache_file = compliancelib.nist800_53._catalog_cache_file(xml_file)
+        cached = os.path.exists(cache_file)
+        compliancelib.nist800_53.CATALOG_INDEXES.pop(xml_file, None)
+        NIST800_53.get_index('2014-07-29')
+        # only tools/build_catalog_cache.py writes into the package data directory
+        self.assertTrue(os.path.exists(cache_file) == cached)
+
+    def test_revisions(self):
+        # AC-2 (9) was retitled between revisions
+        c_old = NIST800_53("AC-2 (9)", revision='2014-07-29')
+        c_new = NIST800_53("AC-2 (9)", revision='2015-02-03')
+        self.assertTrue(c_old.revision == '2014-07-29')
+        self.assertTrue(c_old.title == 'RESTRICTIONS ON USE OF SHARED GROUPS / ACCOUNTS')
+        self.assertTrue(c_new.title == 'RESTRICTIONS ON USE OF SHARED / GROUP ACCOUNTS')
+        self.assertTrue(NIST800_53.get_index('2014-07-29') is not NIST800_53.get_index('2015-02-03'))
+        self.assertTrue(NIST800_53.get("AC-2", '2014-07-29') is not NIST800_53.get("AC-2"))
+        self.assertTrue(NIST800_53.get("AC-2", '2014-07-29').revision == '2014-07-29')
+        self.assertEqual(len(list(NIST800_53.get_control_ids('2014-07-29'))), 256)
+        with self.assertRaises(Exception):
+            NIST800_53("AC-2", revision='1999-01-01')
+
+    def test_revision_indexes_bounded(self):
+        size = compliancelib.nist800_53.CATALOG_INDEXES_SIZE
+        compliancelib.nist800_53.CATALOG_INDEXES_SIZE = 2
+        try:
+            NIST800_53.get_index('2014-07-29')
+            NIST800_53.get_index('2015-02-03')
+            NIST800_53.get_index()
+            self.assertTrue(len(compliancelib.nist800_53.CATALOG_INDEXES) == 2)
+            # least recently used revision and its records were evicted
+            self.assertTrue(compliancelib.nist800_53.REVISIONS['2014-07-29'] not in compliancelib.nist800_53.CATALOG_INDEXES)
+            self.assertTrue(compliancelib.nist800_53.REVISIONS['2014-07-29'] not in compliancelib.nist800_53.CONTROL_REGISTRY)
+        finally:
+            compliancelib.nist800_53.CATALOG_INDEXES_SIZE = size
+
     def test_id(self):
         id = "AT-3"
         c = NIST800_53(id)
@@ -51,6 +129,63 @@ class NIST800_53Test(TestCase):
         c = NIST800_53(id)
         self.assertTrue(c.title == "ROLE-BASED SECURITY TRAINING")
 
+    def test_lazy(self):
+        id = "AT-3"
+        c = NIST800_53(id, lazy=True)
+        # nothing computed until first access
+        self.assertTrue('title' not in c.__dict__)
+        self.assertTrue(c.title == "ROLE-BASED SECURITY TRAINING")
+        self.assertTrue('description_sections' not in c.__dict__)
+        self.assertTrue('responsible' not in c.__dict__)
+        self.assertTrue(c.responsible == "organization")
+        # lazy and eager controls agree
+        e = NIST800_53(id)
+        self.assertTrue(c.description_sections == e.description_sections)
+        self.assertTrue(c.format('json') == e.format('json'))
+        c = NIST800_53("AU-3 (1)", lazy=True)
+        self.assertTrue(c.responsible is None)
+        self.assertFalse(hasattr(c, 'priority'))
+        c = NIST800_53("XY-3000", lazy=True)
+        self.assertTrue(c.title is None)
+        self.assertTrue(c.details == {})
+
+    def test_lazy_responsible_first(self):
+        # responsible is the first attribute read on a fresh lazy control
+        c = NIST800_53("AT-3", lazy=True)
+        self.assertTrue(c.responsible == "organization")
+        self.assertTrue(hasattr(NIST800_53("AT-3", lazy=True), 'responsible'))
+        self.assertTrue(NIST800_53("AT-3", lazy=True).json_dict == NIST800_53("AT-3").json_dict)
+
+    def test_iter_catalog(self):
+        records = list(NIST800_53.iter_catalog())
+        self.assertEqual(len(records), 256 + 666)
+        self.assertTrue([c.id for c in records[0:3]] == ['AC-1', 'AC-2', 'AC-2 (1)'])
+        self.assertTrue(records[1] is NIST800_53.get('AC-2'))
+        self.assertTrue(records[1].parent is None)
+        # control enhancements inherit the family of their control
+        self.assertTrue(records[2].parent == 'AC-2')
+        self.assertTrue(records[2].family == 'ACCESS CONTROL')
+        self.assertTrue(NIST800_53("AU-3 (1)").family == 'AUDIT AND ACCOUNTABILITY')
+
+    def test_get_shared_record(self):
+        c = NIST800_53.get("AU-3")
+        # one shared record per id
+        self.assertTrue(NIST800_53.get("AU-3") is c)
+        self.assertTrue(c.title == "CONTENT OF AUDIT RECORDS")
+        self.assertTrue(c.family == "AUDIT AND ACCOUNTABILITY")
+        self.assertTrue(c.responsible == "information system")
+        self.assertTrue(c.control_enhancements == ('AU-3 (1)', 'AU-3 (2)'))
+        self.assertTrue(c.format('json') == NIST800_53("AU-3").format('json'))
+        # records are read-only
+        with self.assertRaises(AttributeError):
+            c.title = "CHANGED"
+        with self.assertRaises(AttributeError):
+            c.components_dict = {}
+        # unknown ids are not registered
+        c = NIST800_53.get("XY-3000")
+        self.assertTrue(c.title is None)
+        self.assertTrue(NIST800_53.get("XY-3000") is not c)
+
     def test_details_control_enhancement(self):
         id = "AU-3 (1)"
         c = NIST800_53(id)
@@ -0,0 +1,89 @@
+#!/usr/bin/python
+# -*- coding: utf-8 -*-
+
+"""
+LICENSE
+
+ComplianceLib NIST800_53DepsTest is a class for testing complianclib.nist800_53deps
+Copyright (C) 2017  GovReady PBC.
+
+This program is free software: you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+
+This program is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with this program.  If not, see <http://www.gnu.org/licenses/>.
+"""
+
+from unittest import TestCase
+
+from compliancelib import DependencyGraph, NIST800_53Viz
+from compliancelib.nist800_53deps import parse_dependency_line, PRECURSOR, CONCURRENT, SUCCESSOR
+
+class NIST800_53DepsTest(TestCase):
+
+    def test_parse_dependency_line(self):
+        "Test relationship lines are normalized"
+        self.assertTrue(parse_dependency_line("AU-2 : precursor : RA-3\n") == [('AU-2', PRECURSOR, 'RA-3')])
+        self.assertTrue(parse_dependency_line("IA-5(6)\t: PRECURSOR : IA-4") == [('IA-5 (6)', PRECURSOR, 'IA-4')])
+        self.assertTrue(parse_dependency_line("IR-6 : concurrent controls: AU-6, AU-7 ") == [('IR-6', CONCURRENT, 'AU-6'), ('IR-6', CONCURRENT, 'AU-7')])
+        self.assertTrue(parse_dependency_line('MA-2 : psuccessor : MA-3, MA-4"') == [('MA-2', SUCCESSOR, 'MA-3'), ('MA-2', SUCCESSOR, 'MA-4')])
+        for line in ("AC-1 : successor : All other controls in this family", "AU-6 (2) : PRECURSOR : WITHDRAWN",
+                "AC-3 (1) : concurrent : N/A", "AC-1 : concurrent : None ", "", "AU-1 : depends : AU-2"):
+            self.assertTrue(parse_dependency_line(line) == [])
+
+    def test_relationships(self):
+        "Test queries of the relationship graph of the dependency files"
+        g = DependencyGraph.load()
+        self.assertTrue(g is DependencyGraph.load())
+        self.assertTrue(g is NIST800_53Viz("AU-3").relationship_graph())
+        self.assertTrue('AU-2' in g and 'XX-1' not in g)
+        self.assertTrue(g.relationships('AU-2', PRECURSOR) == ['RA-3'])
+        self.assertTrue(set(g.relationships('AU-2', CONCURRENT)) == set(['CM-6', 'SI-4']))
+        # "AU-2 : precursor : RA-3" puts RA-3 before AU-2
+        self.assertTrue('RA-3' in g.precursors('AU-2'))
+        self.assertTrue('AU-2' in g.successors('RA-3'))
+        # concurrent relationships go both ways
+        self.assertTrue('AU-2' in g.concurrent('SI-4') and 'SI-4' in g.concurrent('AU-2'))
+        self.assertTrue(g.precursors('XX-1') == [])
+        # precursor lists of every control, and of listed precursor relationships only
+        self.assertTrue(list(g.precursor_dict()['AT-4']) == g.precursors('AT-4'))
+        self.assertTrue(g.listed_precursor_dict()['AT-4'] == ('AT-2', 'AT-3'))
+        self.assertTrue(g.listed_precursor_dict()['AU-5'] == ('AU-2', 'AU-3', 'AU-8', 'AU-14'))
+        self.assertTrue(list(g.listed_precursor_dict()['AT-4']) == NIST800_53Viz("AU-3").dep_dict['AT-4'])
+        self.assertTrue(any('AU-2' in group and 'SI-4' in group for group in g.concurrent_sets()))
+
+    def test_topological_order(self):
+        "Test precursors come first in the implementation order, except within cycles"
+        g = DependencyGraph.load()
+        order = g.topological_order()
+        self.assertTrue(sorted(order) == sorted(g.ids))
+        components = g.strongly_connected_components()
+        self.assertTrue([c for component in components for c in component] == order)
+        component_of = dict((c, i) for i, component in enumerate(components) for c in component)
+        position = dict((c, i) for i, c in enumerate(order))
+        for control in g.ids:
+            for successor in g.successors(control):
+                if component_of[control] != component_of[successor]:
+                    self.assertTrue(position[control] < position[successor])
+        self.assertTrue(position['PM-9'] < position['RA-3'] < position['AU-2'] < position['AU-3'])
+        for cycle in g.strongly_connected_components(min_size=2):
+            self.assertTrue(len(cycle) > 1)
+
+    def test_cycles(self):
+        "Test strongly connected components of a small graph"
+        g = DependencyGraph([('AC-2', PRECURSOR, 'AC-1'), ('AC-3', PRECURSOR, 'AC-2'), ('AC-2', PRECURSOR, 'AC-3'),
+            ('AC-4', SUCCESSOR, 'AC-1'), ('AC-5', CONCURRENT, 'AC-4')])
+        self.assertTrue(g.ids == ['AC-1', 'AC-2', 'AC-3', 'AC-4', 'AC-5'])
+        self.assertTrue(g.topological_order() == ['AC-4', 'AC-1', 'AC-2', 'AC-3', 'AC-5'])
+        self.assertTrue(g.strongly_connected_components(min_size=2) == [['AC-2', 'AC-3']])
+        self.assertTrue(g.implementation_order('AC-3') == ['AC-4', 'AC-1', 'AC-2', 'AC-3'])
+        self.assertTrue(g.component('AC-3') == ['AC-2', 'AC-3'] and g.component('AC-4') == ['AC-4'])
+        self.assertTrue(DependencyGraph.from_precursor_dict({'AC-2': ['AC-1'], 'AC-9': []}).ids == ['AC-1', 'AC-2', 'AC-9'])
+        self.assertTrue(g.concurrent_sets() == [['AC-4', 'AC-5']])
@@ -0,0 +1,57 @@
+"""
+LICENSE
+
+ComplianceLib NIST800_53DiffTest is a class for testing complianclib.diff_catalogs
+Copyright (C) 2016, 2017  GovReady PBC.
+
+This program is free software: you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+
+This program is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with this program.  If not, see <http://www.gnu.org/licenses/>.
+"""
+
+from unittest import TestCase
+
+from compliancelib import NIST800_53
+from compliancelib import diff_catalogs
+from compliancelib.nist800_53diff import _diff_indexes
+
+class NIST800_53DiffTest(TestCase):
+
+    def test_diff_same_revision(self):
+        changes = diff_catalogs('2015-02-03', '2015-02-03')
+        for key in changes:
+            self.assertTrue(len(changes[key]) == 0)
+
+    def test_diff_revisions(self):
+        changes = diff_catalogs('2014-07-29', '2015-02-03')
+        self.assertTrue(changes['added'] == [])
+        self.assertTrue(changes['removed'] == [])
+        self.assertTrue(changes['withdrawn'] == ['CA-7 (2)'])
+        self.assertTrue(changes['retitled']['AC-2 (9)'] == ('RESTRICTIONS ON USE OF SHARED GROUPS / ACCOUNTS', 'RESTRICTIONS ON USE OF SHARED / GROUP ACCOUNTS'))
+        self.assertTrue('SA-5' in changes['text_changed'])
+        self.assertTrue(changes['related_controls_changed']['SA-12 (9)'] == {'added': [], 'removed': ['PE-21']})
+        self.assertTrue(changes['baselines_changed'] == {})
+
+    def test_diff_reversed(self):
+        changes = diff_catalogs('2015-02-03', '2014-07-29')
+        self.assertTrue(changes['withdrawn'] == [])
+        self.assertTrue(changes['related_controls_changed']['SA-12 (9)'] == {'added': ['PE-21'], 'removed': []})
+
+    def test_diff_priority_and_enhancements(self):
+        old_index = NIST800_53.get_index('2015-02-03')
+        new_index = old_index.copy()
+        new_index['AU-3'] = dict(old_index['AU-3'], priority='P3')
+        new_index['AU-4'] = dict(old_index['AU-4'], control_enhancements=['AU-4 (1)', 'AU-4 (2)'])
+        changes = _diff_indexes(old_index, new_index)
+        self.assertTrue(changes['priority_changed'] == {'AU-3': ('P1', 'P3')})
+        self.assertTrue(changes['control_enhancements_changed'] == {'AU-4': {'added': ['AU-4 (2)'], 'removed': []}})
+        self.assertTrue(changes['text_changed'] == {})
@@ -22,6 +22,8 @@ import unittest
 # import sys
 import os
 import json
+import shutil
+import tempfile
 
 
 # sys.path.append(os.path.join('lib'))
@@ -59,7 +61,40 @@ class NIST800_53VizTest(unittest.TestCase):
         # cv.resolved = []
         cv.dep_resolve(cv.dep_dict, id, cv.resolved)
         # print "precursors: ", cv.resolved
-        self.assertTrue(cv.resolved == ['RA-3', 'AU-2', 'AU-3'])
+        self.assertTrue(cv.resolved == ['PM-9', 'RA-3', 'AU-2', 'AU-3'])
+
+    def test_resolve_all(self):
+        cv = NIST800_53Viz("AU-3")
+        orders = cv.resolve_all()
+        self.assertTrue(list(orders) == list(cv.dep_dict))
+        self.assertTrue(orders['AU-3'] == ['PM-9', 'RA-3', 'AU-2', 'AU-3'])
+        self.assertTrue(orders['AU-5'] == ['PM-9', 'RA-3', 'AU-2', 'AU-3', 'AU-8', 'AU-14', 'AU-5'])
+        for node, order in orders.items():
+            self.assertTrue(order[-1] == node and len(set(order)) == len(order))
+            self.assertTrue(sorted(order) == sorted(cv.precursors(node)))
+            # precursors outside the cycles of node come first
+            position = dict((control, i) for i, control in enumerate(order))
+            for control in order:
+                for precursor in cv.dep_dict[control]:
+                    self.assertTrue(position[precursor] < position[control] or
+                        precursor in cv.relationship_graph().listed_precursor_graph().component(control))
+        # precursors of AC-3 and IA-2 include each other, cycles agree with the graph of listed precursors
+        self.assertTrue(cv.cycles == cv.relationship_graph().listed_precursor_graph().strongly_connected_components(min_size=2))
+        self.assertTrue(any('AC-3' in cycle and 'IA-2' in cycle for cycle in cv.cycles))
+        # cycles are reported and not followed
+        cv = NIST800_53Viz("AU-3")
+        graph = {'A': ['B'], 'B': ['C'], 'C': ['A', 'D'], 'D': []}
+        self.assertTrue(cv.resolve_all(['A', 'C'], graph) == {'A': ['D', 'B', 'C', 'A'], 'C': ['D', 'A', 'B', 'C']})
+        self.assertTrue(cv.cycles == [['A', 'B', 'C']])
+        # graphs of ids that are not 800-53 controls resolve too
+        self.assertTrue(cv.dep_resolve({'X': ['Y'], 'Y': []}, 'X', []) == ['Y', 'X'])
+        self.assertTrue(cv.resolve_all(graph={'AC-2': ['X-1'], 'X-1': ['AC-1'], 'AC-1': []})['AC-2'] == ['AC-1', 'X-1', 'AC-2'])
+
+    def test_precursor_graph(self):
+        cv = NIST800_53Viz("AU-3")
+        resolved = []
+        self.assertTrue(cv.precursor_graph(cv.dep_dict, "AU-3", resolved) == [('AU-2', 'AU-3'), ('RA-3', 'AU-2'), ('PM-9', 'RA-3')])
+        self.assertTrue(resolved == ['AU-3', 'AU-2', 'RA-3', 'PM-9'])
 
     def test_precursor_list(self):
         id = "AU-3"
@@ -93,6 +128,65 @@ class NIST800_53VizTest(unittest.TestCase):
         # print cv.node_options_tuples(cv.nodes)
         self.assertTrue(cv.node_options_tuples(cv.nodes) == [('AU-3', {'fontname': 'arial', 'URL': '/control?id=AU-3', 'tooltip': u'(AU-3) Content Of Audit Records', 'label': u'AU-3\nContent Of Audit Records', 'color': 'palevioletred', 'shape': 'egg', 'fontsize': '12', 'fontcolor': 'palevioletred'}), ('AU-2', {'fontname': 'arial', 'URL': '/control?id=AU-2', 'tooltip': u'(AU-2) Audit Events', 'label': u'AU-2\nAudit Events', 'color': 'cornflowerblue', 'shape': 'egg', 'fontsize': '12', 'fontcolor': 'cornflowerblue'}), ('RA-3', {'fontname': 'arial', 'URL': '/control?id=RA-3', 'tooltip': u'(RA-3) Risk Assessment', 'label': u'RA-3\nRisk Assessment', 'color': 'cornflowerblue', 'shape': 'egg', 'fontsize': '12', 'fontcolor': 'cornflowerblue'}), ('PM-9', {'fontname': 'arial', 'URL': '/control?id=PM-9', 'tooltip': u'(PM-9) Risk Management Strategy', 'label': u'PM-9\nRisk Management Strategy', 'color': 'cornflowerblue', 'shape': 'egg', 'fontsize': '12', 'fontcolor': 'cornflowerblue'})])
 
+    def test_node_options_batch(self):
+        cv = NIST800_53Viz("SA-2")
+        nodes = [node for node in cv.dep_dict if node != "None"]
+        tuples = cv.node_options_tuples(nodes)
+        self.assertTrue([node for node, options in tuples] == nodes)
+        self.assertTrue(tuples[nodes.index("AU-3")][1] == cv.node_options_by_id("AU-3"))
+        self.assertTrue(set(options['color'] for node, options in tuples) <= set(['cornflowerblue', 'palevioletred', 'gray', 'black']))
+        # ids of the dependency files that are not in the catalog get a plain label
+        self.assertTrue(cv.node_options_by_id("IA-2(1)")['label'] == "IA-2(1)")
+
+    def test_render_graph(self):
+        cv = NIST800_53Viz("AU-3")
+        cache_dir = tempfile.mkdtemp()
+        try:
+            self.assertTrue(cv.select_controls() == ["AU-3"])
+            self.assertTrue(cv.select_controls("AU")[:3] == ["AU-1", "AU-2", "AU-3"])
+            self.assertTrue(len(cv.select_controls("*")) > 250)
+            # unicode ids, as loaded from YAML on python 2, are single controls
+            self.assertTrue(cv.select_controls(u"AU-3") == ["AU-3"] and cv.select_controls(u"AU") == cv.select_controls("AU"))
+            path = cv.render_graph(format="dot", cache_dir=cache_dir)
+            source = open(path).read()
+            self.assertTrue(source == cv.graph_source())
+            self.assertTrue('"PM-9" -> "RA-3"' in source and 'size="2.5,2.5"' in source)
+            # unchanged graphs are served from the cache
+            os.utime(path, (0, 0))
+            self.assertTrue(cv.render_graph("AU-3", format="dot", cache_dir=cache_dir) == path)
+            self.assertTrue(os.path.getmtime(path) == 0)
+            cv.set_image_size(4, 4)
+            self.assertTrue(cv.render_graph(format="dot", cache_dir=cache_dir) != path)
+            family_path = cv.render_graph("AU", format="dot", cache_dir=cache_dir)
+            self.assertTrue(cv.render_graph(list(reversed(cv.select_controls("AU"))), format="dot", cache_dir=cache_dir) == family_path)
+            self.assertTrue('"AU-14"' in open(family_path).read())
+            self.assertTrue(len(os.listdir(cache_dir)) == 3)
+        finally:
+            shutil.rmtree(cache_dir)
+
+    def test_render_graph_cache_ownership(self):
+        cv = NIST800_53Viz("AU-3")
+        # the default cache is per user, not shared in the system temp dir
+        self.assertTrue(not cv.graph_cache_dir.startswith(os.path.join(tempfile.gettempdir(), '')) or
+            'COMPLIANCELIB_GRAPH_CACHE_DIR' in os.environ)
+        cache_dir = tempfile.mkdtemp()
+        try:
+            path = cv.render_graph(format="dot", cache_dir=cache_dir)
+            # links planted in place of a cached graph are not served
+            os.remove(path)
+            planted = os.path.join(cache_dir, "planted")
+            with open(planted, "w") as f:
+                f.write("<svg onload='alert(1)'/>")
+            os.symlink(planted, path)
+            self.assertTrue(cv.render_graph(format="dot", cache_dir=cache_dir) == path)
+            self.assertTrue(not os.path.islink(path) and open(path).read() == cv.graph_source())
+            # directories other users can write to are refused
+            os.chmod(cache_dir, 0o777)
+            with self.assertRaises(Exception):
+                cv.render_graph(format="dot", cache_dir=cache_dir)
+        finally:
+            shutil.rmtree(cache_dir)
+
     def test_edges(self):
         id = "AU-3"
         cv = NIST800_53Viz(id)
@@ -172,6 +266,25 @@ Risk Management Strategy" URL="/control?id=PM-9" color=cornflowerblue fontcolor=
         if node_count >= 100: cv.width,cv.height = 12,10
         self.assertTrue(cv.width == 2.75)
         self.assertTrue(cv.height == 2.75)
+
+    def test_shared_dependency_graph(self):
+        cv = NIST800_53Viz("AU-3")
+        cv2 = NIST800_53Viz("AU-5")
+        # dependency files are read once per process, each object gets its own copy
+        self.assertTrue(cv.dep_dict == cv2.dep_dict and cv.dep_dict is not cv2.dep_dict)
+        cv.dep_dict['AU-3'].append('AC-1')
+        self.assertTrue(cv2.dep_dict['AU-3'] == ['AU-2'] and NIST800_53Viz("AU-3").dep_dict['AU-3'] == ['AU-2'])
+        self.assertTrue(cv.precursors("AU-5") is cv2.precursors("AU-5"))
+        self.assertTrue(cv.precursors("AU-5") == ('AU-5', 'AU-2', 'RA-3', 'PM-9', 'AU-3', 'AU-8', 'AU-14'))
+        # precursor and successor relationships are available separately
+        self.assertTrue(cv.relationship_dict()['AT-4'] == ['AT-2', 'AT-2 (1)', 'AT-3', 'AT-3 (1)', 'AT-3 (2)'])
+        self.assertTrue(cv.precursors("XX-1") == ())
+        # long chains do not exceed the recursion limit
+        chain = dict(("N-%s" % i, ["N-%s" % (i + 1)]) for i in range(5000))
+        chain["N-5000"] = ["N-0"]
+        resolved = []
+        cv.precursor_list(chain, "N-0", resolved)
+        self.assertTrue(len(resolved) == 5001)
         
 
         
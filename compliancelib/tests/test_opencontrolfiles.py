@@ -33,6 +33,8 @@ import compliancelib
 import os
 import json
 import yaml
+import shutil
+import tempfile
 from compliancelib import OpenControlFiles
 
 class OpenControlFilesTest(TestCase):
@@ -339,7 +341,44 @@ class OpenControlFilesTest(TestCase):
         items = ocf.list_dependency_items_in_repo(ocfileurl, item_type)
         print("test_list_dependency_items_in_repo 'dependencies' are: ", items)
         self.assertTrue([] == items)
-        
+
+    def test_list_repo_graph_items(self):
+        "Test each opencontrol.yaml in a dependency tree is loaded once and shared repos are resolved once"
+        tmp_dir = tempfile.mkdtemp()
+        try:
+            def write_repo(name, ocfile_dict):
+                os.makedirs(os.path.join(tmp_dir, name))
+                with open(os.path.join(tmp_dir, name, 'opencontrol.yaml'), 'w') as f:
+                    yaml.safe_dump(ocfile_dict, f)
+                return "file://{}/{}".format(tmp_dir, name)
+            shared_url = write_repo('shared', {'name': 'shared', 'standards': ['./standards/S.yaml']})
+            dependency_url = write_repo('dependency', {'name': 'dependency', 'components': ['./C'],
+                'dependencies': {'standards': [{'url': shared_url, 'revision': 'master'}]}})
+            repo_url = write_repo('system', {'name': 'system', 'components': ['./A'],
+                'dependencies': {'standards': [{'url': shared_url, 'revision': 'master'}, {'url': shared_url + '/', 'revision': 'master'}],
+                    'systems': [{'url': dependency_url, 'revision': 'master'}]}})
+            ocf = OpenControlFiles()
+            ocf.logger.setLevel("CRITICAL")
+            items = ocf.list_repo_graph_items(repo_url, 'master', ['components', 'standards', 'systems'], max_depth=2)
+            self.assertTrue(items == [
+                ('components', repo_url + '/./A/component.yaml'),
+                ('standards', shared_url + '/./standards/S.yaml'),
+                ('systems', dependency_url + '/opencontrol.yaml'),
+                ('components', dependency_url + '/./C/component.yaml')])
+            info = ocf.fetch_info()
+            # system, shared and dependency opencontrol.yaml files
+            self.assertTrue(info['fetches'] == 3)
+            self.assertTrue(info['ocfiles'] == 3)
+            self.assertTrue(info['fetches_avoided'] > 0)
+            # one level of dependencies by default
+            ocf = OpenControlFiles()
+            items = ocf.list_repo_graph_items(dependency_url, 'master', ['components', 'standards'])
+            self.assertTrue([item_type for item_type, url in items] == ['components', 'standards'])
+            items = ocf.list_repo_graph_items(repo_url, 'master', ['components', 'standards', 'systems'])
+            self.assertTrue(len(items) == 4)
+        finally:
+            shutil.rmtree(tmp_dir)
+
 
 if __name__ == "__main__":
     unittest.main()
\ No newline at end of file
@@ -0,0 +1,106 @@
+#!/usr/bin/python
+# -*- coding: utf-8 -*-
+
+"""
+LICENSE
+
+ComplianceLib RepoArchiveTest is a class for testing complianclib.repoarchive
+Copyright (C) 2017  GovReady PBC.
+
+This program is free software: you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+
+This program is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with this program.  If not, see <http://www.gnu.org/licenses/>.
+"""
+
+from unittest import TestCase, skipIf
+
+import os
+import shutil
+import tarfile
+import zipfile
+import tempfile
+import subprocess
+
+import compliancelib
+from compliancelib import SystemCompliance
+from compliancelib.repoarchive import RepoArchive, load_repo_archive
+from compliancelib.urlcache import fetch_url
+
+def git_available():
+    try:
+        subprocess.check_output(['git', '--version'])
+        return True
+    except (OSError, subprocess.CalledProcessError):
+        return False
+
+class RepoArchiveTest(TestCase):
+
+    def setUp(self):
+        dir_path = os.path.dirname(os.path.realpath(__file__))
+        self.repo_dir = os.path.join(dir_path, "test_data/repo_no_dependencies")
+        self.repo_url = "file://{}".format(self.repo_dir)
+        self.tmp_dir = tempfile.mkdtemp()
+        compliancelib.OpenControlFiles().logger.setLevel("CRITICAL")
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp_dir)
+
+    def assert_same_system(self, repo_url):
+        sp = SystemCompliance()
+        sp.load_system_from_opencontrol_repo(repo_url)
+        sp_localfile = SystemCompliance()
+        sp_localfile.load_system_from_opencontrol_repo(self.repo_url)
+        self.assertTrue(sp.system == sp_localfile.system)
+        self.assertTrue(sp.components() == ['Audit Policy'])
+        self.assertTrue(sp.control('AU-1').components == sp_localfile.control('AU-1').components)
+
+    def test_tarball(self):
+        "Test loading a system from a tarball with the repo in a top directory"
+        path = os.path.join(self.tmp_dir, 'freedonia-master.tar.gz')
+        with tarfile.open(path, 'w:gz') as tar:
+            tar.add(self.repo_dir, arcname='freedonia-master')
+        repo_url = load_repo_archive(path)
+        self.assertTrue(repo_url.startswith('archive://freedonia-master-'))
+        self.assertTrue(fetch_url(repo_url + '/opencontrol.yaml') == open(os.path.join(self.repo_dir, 'opencontrol.yaml'), 'rb').read())
+        self.assert_same_system(repo_url)
+
+    def test_zip(self):
+        "Test loading a system from a zip file"
+        path = os.path.join(self.tmp_dir, 'freedonia.zip')
+        with zipfile.ZipFile(path, 'w') as archive:
+            for dir_name, dir_names, file_names in os.walk(self.repo_dir):
+                for file_name in file_names:
+                    file_path = os.path.join(dir_name, file_name)
+                    archive.write(file_path, os.path.relpath(file_path, self.repo_dir))
+        self.assert_same_system(load_repo_archive(path))
+
+    @skipIf(not git_available(), "git is not installed")
+    def test_git(self):
+        "Test loading a system from a revision of a bare git repository"
+        work_dir = os.path.join(self.tmp_dir, 'work')
+        shutil.copytree(self.repo_dir, work_dir)
+        git = ['git', '-C', work_dir, '-c', 'user.name=test', '-c', 'user.email=test@example.com']
+        subprocess.check_output(['git', 'init', '-q', work_dir])
+        subprocess.check_output(git + ['add', '.'])
+        subprocess.check_output(git + ['commit', '-q', '-m', 'freedonia'])
+        subprocess.check_output(git + ['tag', 'v1'])
+        bare_dir = os.path.join(self.tmp_dir, 'freedonia.git')
+        subprocess.check_output(['git', 'clone', '-q', '--bare', work_dir, bare_dir])
+        self.assert_same_system(load_repo_archive(bare_dir, revision='v1'))
+        self.assertRaises(Exception, RepoArchive.from_git, bare_dir, 'no-such-revision')
+
+    def test_read(self):
+        "Test reading files of an archive and rejecting paths outside it"
+        archive = RepoArchive({'opencontrol.yaml': b'name: test\n'}, 'test')
+        self.assertTrue(archive.read('./opencontrol.yaml') == b'name: test\n')
+        self.assertRaises(IOError, archive.read, 'missing.yaml')
+        self.assertRaises(IOError, archive.read, '../opencontrol.yaml')
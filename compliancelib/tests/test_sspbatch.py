@@ -0,0 +1,80 @@
+#!/usr/bin/python
+# -*- coding: utf-8 -*-
+
+"""
+LICENSE
+
+ComplianceLib SSPBatchTest is a class for testing complianclib.sspbatch
+Copyright (C) 2017  GovReady PBC.
+
+This program is free software: you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+
+This program is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with this program.  If not, see <http://www.gnu.org/licenses/>.
+"""
+
+from unittest import TestCase
+
+import os
+import json
+import shutil
+import tempfile
+
+import compliancelib
+from compliancelib import SystemCompliance
+from compliancelib.sspbatch import render_ssps
+
+class SSPBatchTest(TestCase):
+
+    def setUp(self):
+        dir_path = os.path.dirname(os.path.realpath(__file__))
+        self.repo_dir = os.path.join(dir_path, "test_data/repo_no_dependencies")
+        self.output_dir = tempfile.mkdtemp()
+        compliancelib.OpenControlFiles().logger.setLevel("CRITICAL")
+
+    def tearDown(self):
+        shutil.rmtree(self.output_dir)
+
+    def test_render_ssps(self):
+        "Test rendering systems in worker processes matches rendering them one by one"
+        sources = [self.repo_dir, self.repo_dir + '/', os.path.join(self.output_dir, 'missing')]
+        results = render_ssps(sources, os.path.join(self.output_dir, 'parallel'), format='json', baseline='LOW', processes=2)
+        sequential = render_ssps(sources, os.path.join(self.output_dir, 'sequential'), format='json', baseline='LOW', processes=1)
+        self.assertTrue([r['source'] for r in results] == sources)
+        self.assertTrue([os.path.basename(r['output']) for r in results] ==
+            ['repo_no_dependencies-ssp.json', 'repo_no_dependencies-2-ssp.json', 'missing-ssp.json'])
+        sp = SystemCompliance()
+        sp.load_system_from_opencontrol_repo("file://{}".format(self.repo_dir))
+        expected = "".join(sp.iter_ssp(baseline='LOW', format='json'))
+        for result, sequential_result in zip(results[:2], sequential[:2]):
+            self.assertTrue(result['error'] is None)
+            self.assertTrue(result['controls'] == len(json.loads(expected)))
+            self.assertTrue(result['seconds'] >= result['load_seconds'] + result['render_seconds'])
+            self.assertTrue(open(result['output']).read() == expected)
+            self.assertTrue(open(sequential_result['output']).read() == expected)
+        # a failing system is reported without stopping the others
+        self.assertTrue(results[2]['error'] is not None)
+        self.assertTrue(sequential[2]['error'] is not None)
+        self.assertRaises(Exception, render_ssps, sources, self.output_dir, format='pdf')
+
+    def test_render_ssp_failure_leaves_no_file(self):
+        "Test a system failing partway through rendering leaves no output file"
+        def failing_iter_ssp(sp, control_ids=None, baseline=None, format='text'):
+            yield "AU-1 - partial plan\n"
+            raise Exception("render failed")
+        iter_ssp = SystemCompliance.iter_ssp
+        SystemCompliance.iter_ssp = failing_iter_ssp
+        try:
+            results = render_ssps([self.repo_dir], self.output_dir, processes=1)
+        finally:
+            SystemCompliance.iter_ssp = iter_ssp
+        self.assertTrue('render failed' in results[0]['error'])
+        self.assertTrue(os.listdir(self.output_dir) == [])
@@ -33,14 +33,18 @@ import compliancelib
 import os
 import json
 import yaml
+import shutil
+import tempfile
 
 from compliancelib import SystemCompliance
 import sys
 
 if sys.version_info >= (3, 0):
+    from io import StringIO
     from urllib.parse import urlparse
     from urllib.request import urlopen
 if sys.version_info < (3, 0) and sys.version_info >= (2, 5):
+    from StringIO import StringIO
     from urlparse import urlparse
     from urllib2 import urlopen
 
@@ -244,6 +248,78 @@ b.2. Audit and accountability procedures [Assignment: organization-defined frequ
         self.assertTrue(ci.responsible == None)
         self.assertTrue(ci.components == ['User Account and Authentication (UAA) Server'])
 
+    def test_control_index(self):
+        "Test satisfies entries of components are indexed by control"
+        sp = SystemCompliance()
+        sp.system_component_add('Comp A', {'name': 'Comp A', 'satisfies': [
+            {'control_key': 'AU-1', 'implementation_status': 'implemented', 'narrative': 'A on AU-1'},
+            {'control_key': 'AU-2', 'implementation_status': 'none', 'narrative': 'A on AU-2'}]})
+        sp.add_system_dict('components', 'Comp B', {'name': 'Comp B', 'satisfies': [
+            {'control_key': 'AU-1', 'implementation_status': 'planned', 'narrative': 'B on AU-1'}]})
+        self.assertTrue(list(sp.control_index['AU-1']) == ['Comp A', 'Comp B'])
+        self.assertTrue(list(sp.control_index['AU-2']) == ['Comp A'])
+        self.assertTrue(sp.control('AU-1').components == ['Comp A', 'Comp B'])
+        self.assertTrue(sp.control('AU-1').implementation_status == ['implemented', 'planned'])
+        # replacing a component replaces its entries
+        sp.system_component_add('Comp A', {'name': 'Comp A', 'satisfies': [
+            {'control_key': 'AU-1', 'implementation_status': 'partial', 'narrative': 'A on AU-1'}]})
+        self.assertTrue('AU-2' not in sp.control_index)
+        self.assertTrue(sp.control('AU-2').components == [])
+        self.assertTrue(sp.control('AU-1').implementation_status == ['partial', 'planned'])
+
+    def test_control_index_replacement_order(self):
+        "Test replaced components keep their place in the system component order"
+        sp = SystemCompliance()
+        sp.system_component_add('A', {'name': 'A', 'satisfies': [{'control_key': 'AU-2', 'implementation_status': 'none', 'narrative': 'A'}]})
+        sp.system_component_add('B', {'name': 'B', 'satisfies': [{'control_key': 'AU-1', 'implementation_status': 'none', 'narrative': 'B'}]})
+        sp.system_component_add('A', {'name': 'A', 'satisfies': [{'control_key': 'AU-1', 'implementation_status': 'none', 'narrative': 'A'}]})
+        self.assertTrue(sp.components() == ['A', 'B'])
+        self.assertTrue(sp.control('AU-1').components == ['A', 'B'])
+        # same as loading the final components afresh
+        fresh = SystemCompliance()
+        for name in sp.components():
+            fresh.system_component_add(name, sp.system['components'][name])
+        self.assertTrue(fresh.control('AU-1').implementation_narrative == sp.control('AU-1').implementation_narrative)
+
+    def test_control_cache(self):
+        "Test control objects are reused until components change"
+        sp = SystemCompliance()
+        sp.system_component_add('Comp A', {'name': 'Comp A', 'satisfies': [
+            {'control_key': 'AU-1', 'implementation_status': 'implemented', 'narrative': 'A on AU-1'}]})
+        ci = sp.control('AU-1')
+        self.assertTrue(sp.control('AU-1') is ci)
+        self.assertTrue(sp.control_cache_info() == {'hits': 1, 'misses': 1, 'size': 1, 'maxsize': 256})
+        # adding a component invalidates cached controls
+        sp.system_component_add('Comp B', {'name': 'Comp B', 'satisfies': [
+            {'control_key': 'AU-1', 'implementation_status': 'planned', 'narrative': 'B on AU-1'}]})
+        self.assertTrue(sp.control_cache_info()['size'] == 0)
+        self.assertTrue(sp.control('AU-1') is not ci)
+        self.assertTrue(sp.control('AU-1').components == ['Comp A', 'Comp B'])
+        # least recently used controls are evicted beyond the size cap
+        sp.control_cache_size = 2
+        sp.control('AU-2')
+        sp.control('AU-3')
+        self.assertTrue(list(sp.control_cache) == [('AU-2', 'NIST800_53', None), ('AU-3', 'NIST800_53', None)])
+
+    def test_control_shares_catalog_record(self):
+        "Test control implementation details are layered over the shared catalog record"
+        my_components = ['../data/UAA_component.yaml', '../data/AU_policy_component.yaml']
+        sp1 = SystemCompliance()
+        sp1.add_component_from_url("file://%s" % os.path.join(os.path.dirname(__file__), my_components[0]))
+        sp2 = SystemCompliance()
+        sp2.add_component_from_url("file://%s" % os.path.join(os.path.dirname(__file__), my_components[1]))
+        ci1 = sp1.control("AU-1")
+        ci2 = sp2.control("AU-1")
+        self.assertTrue(ci1.standard_control is compliancelib.NIST800_53.get("AU-1"))
+        self.assertTrue(ci1.standard_control is ci2.standard_control)
+        self.assertTrue(ci1.title == 'AUDIT AND ACCOUNTABILITY POLICY AND PROCEDURES')
+        self.assertTrue(ci1.components == [])
+        self.assertTrue(ci2.components == ['Audit Policy'])
+        # NIST800_53 members not on the record are still reachable
+        self.assertTrue(ci2.json_dict == compliancelib.NIST800_53("AU-1").json_dict)
+        self.assertTrue(ci2.replace_line_breaks("a\nb") == "a<br />b")
+        self.assertTrue(ci1.json_dict is not ci2.json_dict)
+
     def test_narrative_extraction(self):
         "Test control method correctly extracts narrative for different cases of data format"
         # comp_contribution['narative'] is a string, like this:
@@ -321,5 +397,111 @@ b.2. Audit and accountability procedures [Assignment: organization-defined frequ
         self.assertTrue('FredRAMP-low' in sp.certifications())
         self.assertTrue('LATO' in sp.certifications())
 
+    def test_load_system_from_opencontrol_repo_concurrent(self):
+        "Test concurrent and sequential loading of a repo produce the same system"
+        dir_path = os.path.dirname(os.path.realpath(__file__))
+        repo_url = "file://{}/{}".format(dir_path, "test_data/repo_no_dependencies")
+        ocf = compliancelib.OpenControlFiles()
+        ocf.logger.setLevel("CRITICAL")
+        sp = SystemCompliance()
+        items = sp.list_opencontrol_repo_items(repo_url)
+        self.assertTrue([item_type for item_type, url in items] == ['components', 'standards', 'certifications', 'certifications'])
+        sp.load_system_from_opencontrol_repo(repo_url, max_workers=4)
+        sp_sequential = SystemCompliance()
+        sp_sequential.load_system_from_opencontrol_repo(repo_url, max_workers=1)
+        self.assertTrue(sp.system == sp_sequential.system)
+        self.assertTrue(sp.components() == ['Audit Policy'])
+        self.assertTrue(sp.standards() == ['FRIST-800-53'])
+        # certifications are added in the order listed in opencontrol.yaml
+        self.assertTrue(sp.certifications() == ['FredRAMP-low', 'LATO'])
+
+    def test_refresh_system_from_opencontrol_repo(self):
+        "Test refreshing a system only reloads items added, changed or removed in the repo"
+        dir_path = os.path.dirname(os.path.realpath(__file__))
+        tmp_dir = tempfile.mkdtemp()
+        try:
+            repo_dir = os.path.join(tmp_dir, "repo")
+            shutil.copytree(os.path.join(dir_path, "test_data/repo_no_dependencies"), repo_dir)
+            repo_url = "file://{}".format(repo_dir)
+            compliancelib.OpenControlFiles().logger.setLevel("CRITICAL")
+            sp = SystemCompliance()
+            self.assertRaises(Exception, sp.refresh_system_from_opencontrol_repo)
+            sp.load_system_from_opencontrol_repo(repo_url)
+            changes = sp.refresh_system_from_opencontrol_repo()
+            self.assertTrue(len(changes['unchanged']) == 4)
+            self.assertTrue(changes['added'] == changes['changed'] == changes['removed'] == [])
+            self.assertTrue(sp.control('AU-2').components == ['Audit Policy'])
+            # change a component, add another and drop a certification
+            component_file = os.path.join(repo_dir, "AU_policy/component.yaml")
+            with open(component_file) as f:
+                component = yaml.safe_load(f)
+            component['satisfies'] = [ck for ck in component['satisfies'] if ck['control_key'] != 'AU-2']
+            with open(component_file, 'w') as f:
+                yaml.safe_dump(component, f)
+            os.makedirs(os.path.join(repo_dir, "AU_logging"))
+            with open(os.path.join(repo_dir, "AU_logging/component.yaml"), 'w') as f:
+                yaml.safe_dump({'name': 'Audit Logging', 'satisfies': [{'control_key': 'AU-2',
+                    'implementation_status': 'implemented', 'narrative': 'Logs are kept'}]}, f)
+            with open(os.path.join(repo_dir, "opencontrol.yaml")) as f:
+                ocfile = yaml.safe_load(f)
+            ocfile['components'].append('./AU_logging')
+            ocfile['certifications'] = ['./certifications/LATO.yaml']
+            with open(os.path.join(repo_dir, "opencontrol.yaml"), 'w') as f:
+                yaml.safe_dump(ocfile, f)
+            changes = sp.refresh_system_from_opencontrol_repo()
+            self.assertTrue(changes['added'] == [('components', repo_url + '/./AU_logging/component.yaml')])
+            self.assertTrue(changes['changed'] == [('components', repo_url + '/./AU_policy/component.yaml')])
+            self.assertTrue(changes['removed'] == [('certifications', repo_url + '/./certifications/FredRAMP-low.yaml')])
+            self.assertTrue(len(changes['unchanged']) == 2)
+            self.assertTrue(sp.components() == ['Audit Policy', 'Audit Logging'])
+            self.assertTrue(sp.certifications() == ['LATO'])
+            self.assertTrue(sp.control('AU-2').components == ['Audit Logging'])
+            self.assertTrue(sp.control('AU-1').components == ['Audit Policy'])
+            # a fresh load gives the same system
+            sp_loaded = SystemCompliance()
+            sp_loaded.load_system_from_opencontrol_repo(repo_url)
+            self.assertTrue(sp.system == sp_loaded.system)
+            self.assertTrue(sp.control_index == sp_loaded.control_index)
+        finally:
+            shutil.rmtree(tmp_dir)
+
+    def test_write_ssp(self):
+        "Test streaming system security plan text, json and yaml for many controls"
+        dir_path = os.path.dirname(os.path.realpath(__file__))
+        repo_url = "file://{}/{}".format(dir_path, "test_data/repo_no_dependencies")
+        compliancelib.OpenControlFiles().logger.setLevel("CRITICAL")
+        sp = SystemCompliance()
+        sp.load_system_from_opencontrol_repo(repo_url)
+        # text matches control_ssp_text
+        out = StringIO()
+        sp.write_ssp(out, control_ids=['AU-1', 'AU-2'])
+        stdout = sys.stdout
+        sys.stdout = StringIO()
+        try:
+            sp.control_ssp_text('AU-1')
+            sp.control_ssp_text('AU-2')
+            printed = sys.stdout.getvalue()
+        finally:
+            sys.stdout = stdout
+        self.assertTrue(out.getvalue() == printed)
+        self.assertTrue(out.getvalue().startswith("AU-1 - AUDIT AND ACCOUNTABILITY POLICY AND PROCEDURES\n"))
+        # baselines select controls and control enhancements in catalog order
+        chunks = list(sp.iter_ssp(baseline='low', format='json'))
+        ssp = json.loads("".join(chunks))
+        self.assertTrue(len(chunks) == len(ssp) + 2)
+        self.assertTrue(ssp[0]['id'] == 'AC-1')
+        self.assertTrue('AC-2 (1)' not in [c['id'] for c in ssp])
+        self.assertTrue(len([c for c in ssp if c['id'].startswith('AU-')]) == 10)
+        au_2 = [c for c in ssp if c['id'] == 'AU-2'][0]
+        self.assertTrue(au_2['components'] == ['Audit Policy'])
+        self.assertTrue(au_2['implementation_status'] == ['none'])
+        high = yaml.safe_load("".join(sp.iter_ssp(baseline='HIGH', format='yaml')))
+        self.assertTrue([c['id'] for c in high if c['id'].startswith('AU-2')] == ['AU-2', 'AU-2 (3)'])
+        # all controls that are not withdrawn by default, without filling the control cache
+        self.assertTrue(len(list(sp.iter_ssp())) == 826)
+        self.assertTrue(sp.control_cache_info()['size'] == 2)
+        self.assertRaises(Exception, list, sp.iter_ssp(format='pdf'))
+
+
 if __name__ == "__main__":
     unittest.main()
\ No newline at end of file
@@ -0,0 +1,116 @@
+#!/usr/bin/python
+# -*- coding: utf-8 -*-
+
+"""
+LICENSE
+
+ComplianceLib HTTPTransportTest is a class for testing complianclib.transport
+Copyright (C) 2017  GovReady PBC.
+
+This program is free software: you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+
+This program is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with this program.  If not, see <http://www.gnu.org/licenses/>.
+"""
+
+from unittest import TestCase
+
+import sys
+import threading
+
+from compliancelib.transport import HTTPTransport, raise_for_status
+
+if sys.version_info >= (3, 0):
+    from http.server import HTTPServer, BaseHTTPRequestHandler
+    from socketserver import ThreadingMixIn
+    from urllib.error import HTTPError
+if sys.version_info < (3, 0) and sys.version_info >= (2, 5):
+    from BaseHTTPServer import HTTPServer, BaseHTTPRequestHandler
+    from SocketServer import ThreadingMixIn
+    from urllib2 import HTTPError
+
+class ThreadingHTTPServer(ThreadingMixIn, HTTPServer):
+    daemon_threads = True
+
+class KeepAliveHandler(BaseHTTPRequestHandler):
+    "serve paths over keep-alive connections, recording the client port of each request"
+    protocol_version = 'HTTP/1.1'
+    client_ports = []
+    # number of 503 responses to send before succeeding
+    failures = 0
+
+    def do_GET(self):
+        KeepAliveHandler.client_ports.append(self.client_address[1])
+        if self.path == '/moved':
+            self.send_response(302)
+            self.send_header('Location', '/component.yaml')
+            self.send_header('Content-Length', '0')
+            self.end_headers()
+            return
+        if self.path == '/missing':
+            status, body = 404, b'not found'
+        elif KeepAliveHandler.failures > 0:
+            KeepAliveHandler.failures -= 1
+            status, body = 503, b'try again'
+        else:
+            status, body = 200, ("name: %s\n" % self.path).encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+class HTTPTransportTest(TestCase):
+
+    def setUp(self):
+        KeepAliveHandler.client_ports = []
+        KeepAliveHandler.failures = 0
+        self.server = ThreadingHTTPServer(('127.0.0.1', 0), KeepAliveHandler)
+        self.thread = threading.Thread(target=self.server.serve_forever)
+        self.thread.daemon = True
+        self.thread.start()
+        self.base_url = "http://127.0.0.1:%s" % self.server.server_address[1]
+        self.transport = HTTPTransport(timeout=5, retries=2, backoff=0.01)
+
+    def tearDown(self):
+        self.transport.close()
+        self.server.shutdown()
+        self.server.server_close()
+
+    def test_connection_reused(self):
+        for path in ['/a/component.yaml', '/b/component.yaml', '/c/component.yaml']:
+            response = self.transport.get(self.base_url + path)
+            self.assertTrue(response.status == 200)
+            self.assertTrue(response.body == ("name: %s\n" % path).encode('utf-8'))
+        # all requests were sent over one connection
+        self.assertTrue(len(KeepAliveHandler.client_ports) == 3)
+        self.assertTrue(len(set(KeepAliveHandler.client_ports)) == 1)
+
+    def test_retry_with_backoff(self):
+        KeepAliveHandler.failures = 2
+        response = self.transport.get(self.base_url + '/component.yaml')
+        self.assertTrue(response.status == 200)
+        self.assertTrue(len(KeepAliveHandler.client_ports) == 3)
+        # retries exhausted
+        KeepAliveHandler.failures = 5
+        response = self.transport.get(self.base_url + '/component.yaml')
+        self.assertTrue(response.status == 503)
+
+    def test_redirect_and_errors(self):
+        response = self.transport.get(self.base_url + '/moved')
+        self.assertTrue(response.status == 200)
+        self.assertTrue(response.url == self.base_url + '/component.yaml')
+        response = self.transport.get(self.base_url + '/missing')
+        self.assertTrue(response.status == 404)
+        with self.assertRaises(HTTPError):
+            raise_for_status(response)
@@ -0,0 +1,117 @@
+#!/usr/bin/python
+# -*- coding: utf-8 -*-
+
+"""
+LICENSE
+
+ComplianceLib URLCacheTest is a class for testing complianclib.urlcache
+Copyright (C) 2017  GovReady PBC.
+
+This program is free software: you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+
+This program is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with this program.  If not, see <http://www.gnu.org/licenses/>.
+"""
+
+from unittest import TestCase
+
+import os
+import sys
+import shutil
+import tempfile
+import threading
+
+import compliancelib
+from compliancelib.urlcache import URLCache, set_url_cache, get_url_cache, fetch_url_if_modified
+
+if sys.version_info >= (3, 0):
+    from http.server import HTTPServer, BaseHTTPRequestHandler
+if sys.version_info < (3, 0) and sys.version_info >= (2, 5):
+    from BaseHTTPServer import HTTPServer, BaseHTTPRequestHandler
+
+class ComponentHandler(BaseHTTPRequestHandler):
+    "serve one component.yaml with an ETag, counting full and conditional responses"
+    body = b"name: Audit Policy\nsatisfies:\n- control_key: AU-1\n  implementation_status: implemented\n  narrative: text\n"
+    etag = '"v1"'
+    served = []
+
+    def do_GET(self):
+        if self.headers.get('If-None-Match') == ComponentHandler.etag:
+            ComponentHandler.served.append(304)
+            self.send_response(304)
+            self.end_headers()
+            return
+        ComponentHandler.served.append(200)
+        self.send_response(200)
+        self.send_header('ETag', ComponentHandler.etag)
+        self.send_header('Content-Length', str(len(ComponentHandler.body)))
+        self.end_headers()
+        self.wfile.write(ComponentHandler.body)
+
+    def log_message(self, *args):
+        pass
+
+class URLCacheTest(TestCase):
+
+    def setUp(self):
+        ComponentHandler.served = []
+        self.server = HTTPServer(('127.0.0.1', 0), ComponentHandler)
+        self.thread = threading.Thread(target=self.server.serve_forever)
+        self.thread.daemon = True
+        self.thread.start()
+        self.url = "http://127.0.0.1:%s/AU_policy/component.yaml" % self.server.server_address[1]
+        self.cache_dir = tempfile.mkdtemp()
+
+    def tearDown(self):
+        self.server.shutdown()
+        self.server.server_close()
+        shutil.rmtree(self.cache_dir)
+
+    def test_fetch_revalidates(self):
+        cache = URLCache(self.cache_dir)
+        self.assertTrue(cache.fetch(self.url) == ComponentHandler.body)
+        # a second cache on the same directory revalidates instead of downloading
+        cache = URLCache(self.cache_dir)
+        self.assertTrue(cache.fetch(self.url) == ComponentHandler.body)
+        self.assertTrue(ComponentHandler.served == [200, 304])
+
+    def test_fetch_offline(self):
+        cache = URLCache(self.cache_dir, offline=True)
+        with self.assertRaises(Exception):
+            cache.fetch(self.url)
+        URLCache(self.cache_dir).fetch(self.url)
+        self.assertTrue(cache.fetch(self.url) == ComponentHandler.body)
+        self.assertTrue(ComponentHandler.served == [200])
+
+    def test_shared_cache(self):
+        previous = get_url_cache()
+        set_url_cache(URLCache(self.cache_dir))
+        try:
+            sp = compliancelib.SystemCompliance()
+            sp.add_component_from_url(self.url)
+            ocf = compliancelib.OpenControlFiles()
+            self.assertTrue(ocf.load_ocfile_from_url(self.url)['name'] == 'Audit Policy')
+            self.assertTrue(sp.components() == ['Audit Policy'])
+            self.assertTrue(ComponentHandler.served == [200, 304])
+        finally:
+            set_url_cache(previous)
+
+    def test_fetch_url_if_modified(self):
+        previous = get_url_cache()
+        set_url_cache(None)
+        try:
+            content, validators = fetch_url_if_modified(self.url)
+            self.assertTrue(content == ComponentHandler.body)
+            self.assertTrue(validators['etag'] == ComponentHandler.etag)
+            self.assertTrue(fetch_url_if_modified(self.url, validators) == (None, validators))
+            self.assertTrue(ComponentHandler.served == [200, 304])
+        finally:
+            set_url_cache(previous)
@@ -0,0 +1,85 @@
+#!/usr/bin/python
+# -*- coding: utf-8 -*-
+
+"""
+LICENSE
+
+ComplianceLib YamlioTest is a class for testing complianclib.yamlio
+Copyright (C) 2017  GovReady PBC.
+
+This program is free software: you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+
+This program is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with this program.  If not, see <http://www.gnu.org/licenses/>.
+"""
+
+from unittest import TestCase
+
+import os
+import yaml
+
+import compliancelib
+from compliancelib.yamlio import load_yaml, dump_yaml, load_yaml_cached, parsed_cache_info, clear_parsed_cache
+
+class YamlioTest(TestCase):
+
+    def test_load_yaml(self):
+        "Test loading component files gives the same result as yaml.safe_load"
+        data_path = os.path.join(os.path.dirname(compliancelib.__file__), 'data')
+        for file_name in ('UAA_component.yaml', 'AU_policy_component.yaml'):
+            with open(os.path.join(data_path, file_name)) as f:
+                content = f.read()
+            self.assertTrue(load_yaml(content) == yaml.safe_load(content))
+            self.assertTrue(load_yaml(content, loader=yaml.SafeLoader) == yaml.safe_load(content))
+        # only standard tags are constructed
+        self.assertRaises(yaml.YAMLError, load_yaml, "!!python/object/apply:os.system ['true']")
+
+    def test_dump_yaml(self):
+        "Test dumped control details load back unchanged"
+        c = compliancelib.NIST800_53("AU-2")
+        dumped = dump_yaml(c.json_dict, allow_unicode=True, default_flow_style=False, indent=4)
+        self.assertTrue(yaml.safe_load(dumped) == c.json_dict)
+        self.assertTrue(yaml.safe_load(c.format('yaml')) == c.json_dict)
+        self.assertTrue(dump_yaml({'id': 'AU-2'}, dumper=yaml.SafeDumper) == yaml.safe_dump({'id': 'AU-2'}))
+
+    def test_load_yaml_cached(self):
+        "Test identical content is parsed once and each load gets its own copy"
+        clear_parsed_cache()
+        content = b"name: Audit Policy\nsatisfies:\n- control_key: AU-1\n  narrative: text\n"
+        component = load_yaml_cached(content)
+        self.assertTrue(component == yaml.safe_load(content))
+        self.assertTrue(load_yaml_cached(content.decode('utf-8')) == component)
+        self.assertTrue(load_yaml_cached(content.replace(b"\n", b"\r\n")) == component)
+        self.assertTrue(load_yaml_cached(content + b"  implementation_status: none\n") != component)
+        # changing a loaded document does not change later loads
+        component['satisfies'][0]['narrative'] = 'changed'
+        component['satisfies'].append({'control_key': 'AU-2'})
+        self.assertTrue(load_yaml_cached(content) == yaml.safe_load(content))
+        info = parsed_cache_info()
+        self.assertTrue((info['hits'], info['misses'], info['size']) == (3, 2, 2))
+        # systems loading the same repo parse components once but do not share them
+        dir_path = os.path.dirname(os.path.realpath(__file__))
+        repo_url = "file://{}/{}".format(dir_path, "test_data/repo_no_dependencies")
+        compliancelib.OpenControlFiles().logger.setLevel("CRITICAL")
+        sp1 = compliancelib.SystemCompliance()
+        sp1.load_system_from_opencontrol_repo(repo_url)
+        sp2 = compliancelib.SystemCompliance()
+        sp2.load_system_from_opencontrol_repo(repo_url)
+        self.assertTrue(sp1.system['components']['Audit Policy'] == sp2.system['components']['Audit Policy'])
+        self.assertTrue(sp1.system['components']['Audit Policy'] is not sp2.system['components']['Audit Policy'])
+        narrative = sp2.control('AU-1').implementation_narrative
+        sp1.control('AU-1').components_dict['Audit Policy'][0]['narrative'] = 'changed'
+        sp1.system['components']['Audit Policy']['satisfies'][0]['control_key'] = 'AU-9'
+        sp2.control_cache.clear()
+        self.assertTrue(sp2.control('AU-1').implementation_narrative == narrative)
+        self.assertTrue(sp2.control('AU-1').components == ['Audit Policy'])
+        clear_parsed_cache()
+        self.assertTrue(parsed_cache_info()['size'] == 0)
@@ -0,0 +1,189 @@
+#!/usr/bin/python
+# -*- coding: utf-8 -*-
+"""HTTP transport for fetching OpenControl files
+
+Keeps connections alive and pools them per host so loading the many files
+of an OpenControl repo from the same host does not open a new TCP and TLS
+connection per file. Requests time out, and failed connections and 5xx
+responses are retried with exponential backoff.
+
+Any object with a `get(url, headers)` method returning a TransportResponse
+can replace the default transport with `set_transport`.
+
+Example python CLI
+------------------
+
+from compliancelib.transport import HTTPTransport, set_transport
+set_transport(HTTPTransport(timeout=10, retries=5))
+
+LICENSE
+
+ComplianceLib HTTPTransport is a class for fetching OpenControl files over HTTP
+Copyright (C) 2017  GovReady PBC.
+
+This program is free software: you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+
+This program is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with this program.  If not, see <http://www.gnu.org/licenses/>.
+"""
+
+__author__ = "Greg Elin (gregelin@govready.com)"
+__version__ = "$Revision: 0.1.0 $"
+__date__ = "$Date: 2017/05/20 10:00:00 $"
+__copyright__ = "Copyright (c) 2017 GovReady PBC"
+__license__ = "GNU General Public License v3 (GPLv3)"
+
+import sys
+import time
+import socket
+import logging
+import threading
+from collections import namedtuple
+
+if sys.version_info >= (3, 0):
+    from http.client import HTTPConnection, HTTPSConnection, HTTPException
+    from urllib.parse import urlparse, urljoin
+    from urllib.request import getproxies, proxy_bypass, urlopen, Request
+    from urllib.error import HTTPError
+if sys.version_info < (3, 0) and sys.version_info >= (2, 5):
+    from httplib import HTTPConnection, HTTPSConnection, HTTPException
+    from urlparse import urlparse, urljoin
+    from urllib import getproxies, proxy_bypass
+    from urllib2 import urlopen, Request, HTTPError
+
+logger = logging.getLogger('compliancelib.transport')
+
+# headers are a dictionary with lowercase names
+TransportResponse = namedtuple('TransportResponse', ['url', 'status', 'reason', 'headers', 'body'])
+
+class HTTPTransport(object):
+    "HTTP(S) transport pooling keep-alive connections per host, with timeouts and retries"
+    retry_statuses = (500, 502, 503, 504)
+    redirect_statuses = (301, 302, 303, 307, 308)
+    max_redirects = 5
+
+    def __init__(self, timeout=30, retries=3, backoff=0.5, pool_size=8):
+        self.timeout = timeout
+        # attempts after the first, waiting backoff, 2 * backoff, 4 * backoff... seconds
+        self.retries = retries
+        self.backoff = backoff
+        # idle connections kept per host
+        self.pool_size = pool_size
+        self.pools = {}
+        self.lock = threading.Lock()
+
+    def get(self, url, headers=None):
+        "GET a URL, following redirects, and return a TransportResponse"
+        for i in range(self.max_redirects + 1):
+            response = self._get(url, headers or {})
+            if response.status not in self.redirect_statuses or 'location' not in response.headers:
+                return response
+            url = urljoin(url, response.headers['location'])
+        return response
+
+    def close(self):
+        "close all idle connections"
+        with self.lock:
+            pools, self.pools = self.pools, {}
+        for pool in pools.values():
+            for conn in pool:
+                conn.close()
+
+    def _get(self, url, headers):
+        "GET a URL without following redirects, retrying failures"
+        parsed = urlparse(url)
+        if parsed.scheme not in ('http', 'https'):
+            raise Exception('HTTPTransport only supports http and https URLs, not %s' % url)
+        if self._proxied(parsed):
+            return self._get_with_urlopen(url, headers)
+        key = (parsed.scheme, parsed.hostname, parsed.port)
+        path = parsed.path or '/'
+        if parsed.query:
+            path += '?' + parsed.query
+        attempt = 0
+        while True:
+            conn, reused = self._acquire(key)
+            try:
+                conn.request('GET', path, headers=headers)
+                r = conn.getresponse()
+                body = r.read()
+            except (socket.error, HTTPException) as e:
+                conn.close()
+                if reused:
+                    # the server closed the idle keep-alive connection, retry at once on another
+                    continue
+                # unknown hosts will not resolve on retry
+                if attempt >= self.retries or isinstance(e, socket.gaierror):
+                    raise
+                logger.debug("retrying %s after %s" % (url, e))
+            else:
+                response = TransportResponse(url, r.status, r.reason,
+                    dict((name.lower(), value) for name, value in r.getheaders()), body)
+                if r.will_close:
+                    conn.close()
+                else:
+                    self._release(key, conn)
+                if response.status not in self.retry_statuses or attempt >= self.retries:
+                    return response
+                logger.debug("retrying %s after status %s" % (url, response.status))
+            time.sleep(self.backoff * (2 ** attempt))
+            attempt += 1
+
+    def _acquire(self, key):
+        "take an idle connection to a host from the pool or open a new one, returns (connection, reused)"
+        with self.lock:
+            pool = self.pools.get(key)
+            if pool:
+                return pool.pop(), True
+        scheme, host, port = key
+        if scheme == 'https':
+            return HTTPSConnection(host, port, timeout=self.timeout), False
+        return HTTPConnection(host, port, timeout=self.timeout), False
+
+    def _release(self, key, conn):
+        "return a connection to the pool of its host"
+        with self.lock:
+            pool = self.pools.setdefault(key, [])
+            if len(pool) < self.pool_size:
+                pool.append(conn)
+                return
+        conn.close()
+
+    def _proxied(self, parsed):
+        "whether requests to a URL must go through a configured proxy"
+        return parsed.scheme in getproxies() and not proxy_bypass(parsed.hostname)
+
+    def _get_with_urlopen(self, url, headers):
+        "GET a URL through urllib, which handles proxies, without pooling"
+        try:
+            r = urlopen(Request(url, headers=headers), timeout=self.timeout)
+            status, reason = r.getcode(), ''
+        except HTTPError as e:
+            r, status, reason = e, e.code, e.msg
+        return TransportResponse(url, status, reason,
+            dict((name.lower(), value) for name, value in r.info().items()), r.read())
+
+
+TRANSPORT = HTTPTransport()
+
+def get_transport():
+    "get the transport used to fetch http(s) URLs"
+    return TRANSPORT
+
+def set_transport(transport):
+    "set the transport used to fetch http(s) URLs"
+    global TRANSPORT
+    TRANSPORT = transport
+
+def raise_for_status(response):
+    "raise HTTPError, as urlopen would, for a response that is not successful"
+    if response.status >= 400:
+        raise HTTPError(response.url, response.status, response.reason, response.headers, None)
@@ -0,0 +1,192 @@
+#!/usr/bin/python
+# -*- coding: utf-8 -*-
+"""Persistent cache of OpenControl files fetched from URLs
+
+Stores the body of each fetched file on disk together with its ETag and
+Last-Modified validators, revalidates with conditional requests, and can
+serve cached content only when offline.
+
+The cache is off unless configured, either in code or by setting the
+environment variables COMPLIANCELIB_CACHE_DIR (and optionally
+COMPLIANCELIB_OFFLINE=1).
+
+Example python CLI
+------------------
+
+import compliancelib
+from compliancelib.urlcache import URLCache, set_url_cache
+set_url_cache(URLCache('/var/cache/compliancelib'))
+sp = compliancelib.SystemCompliance()
+sp.load_system_from_opencontrol_repo('https://github.com/opencontrol/freedonia-compliance')
+
+# later, without network access
+set_url_cache(URLCache('/var/cache/compliancelib', offline=True))
+
+LICENSE
+
+ComplianceLib URLCache is a class for caching OpenControl files fetched from URLs
+Copyright (C) 2017  GovReady PBC.
+
+This program is free software: you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+
+This program is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with this program.  If not, see <http://www.gnu.org/licenses/>.
+"""
+
+__author__ = "Greg Elin (gregelin@govready.com)"
+__version__ = "$Revision: 0.1.0 $"
+__date__ = "$Date: 2017/05/20 10:00:00 $"
+__copyright__ = "Copyright (c) 2017 GovReady PBC"
+__license__ = "GNU General Public License v3 (GPLv3)"
+
+import os
+import json
+import sys
+import hashlib
+import socket
+import logging
+import tempfile
+from .transport import get_transport, raise_for_status
+from .repoarchive import read_archive_url
+
+if sys.version_info >= (3, 0):
+    from http.client import HTTPException
+    from urllib.parse import urlparse
+    from urllib.request import urlopen
+if sys.version_info < (3, 0) and sys.version_info >= (2, 5):
+    from httplib import HTTPException
+    from urlparse import urlparse
+    from urllib2 import urlopen
+
+logger = logging.getLogger('compliancelib.urlcache')
+
+class URLCache(object):
+    "on-disk cache of files fetched from URLs, revalidated with ETag and Last-Modified"
+
+    def __init__(self, cache_dir, offline=False):
+        self.cache_dir = cache_dir
+        # when offline only cached content is served
+        self.offline = offline
+        if not os.path.isdir(cache_dir):
+            os.makedirs(cache_dir)
+
+    def fetch(self, url):
+        "return the content of a URL, from the cache when the server reports it unchanged"
+        # only http(s) responses carry validators, read other URLs (file://) directly
+        if urlparse(url).scheme not in ('http', 'https'):
+            return urlopen(url).read()
+        meta, body = self._read(url)
+        if self.offline:
+            if body is None:
+                raise Exception('Offline and no cached copy of %s' % url)
+            return body
+        headers = {}
+        if body is not None:
+            if meta.get('etag'):
+                headers['If-None-Match'] = meta['etag']
+            if meta.get('last_modified'):
+                headers['If-Modified-Since'] = meta['last_modified']
+        try:
+            response = get_transport().get(url, headers)
+        except (socket.error, HTTPException) as e:
+            if body is not None:
+                logger.warning("serving cached copy of %s: %s" % (url, e))
+                return body
+            raise
+        if response.status == 304 and body is not None:
+            logger.debug("not modified: %s" % url)
+            return body
+        raise_for_status(response)
+        self._write(url, {'url': url, 'etag': response.headers.get('etag'), 'last_modified': response.headers.get('last-modified')}, response.body)
+        return response.body
+
+    def clear(self):
+        "remove all cached files"
+        for name in os.listdir(self.cache_dir):
+            if name.endswith('.json') or name.endswith('.body'):
+                os.remove(os.path.join(self.cache_dir, name))
+
+    def _path(self, url):
+        "cache file path prefix of a URL"
+        return os.path.join(self.cache_dir, hashlib.sha1(url.encode('utf-8')).hexdigest())
+
+    def _read(self, url):
+        "return cached validators and body of a URL, or ({}, None) if not cached"
+        path = self._path(url)
+        try:
+            with open(path + '.json') as f:
+                meta = json.load(f)
+            with open(path + '.body', 'rb') as f:
+                body = f.read()
+        except (IOError, OSError, ValueError):
+            return {}, None
+        return meta, body
+
+    def _write(self, url, meta, body):
+        "store validators and body of a URL, each written atomically"
+        path = self._path(url)
+        # body first, so validators never describe a body that is not on disk
+        self._write_file(path + '.body', body)
+        self._write_file(path + '.json', json.dumps(meta).encode('utf-8'))
+
+    def _write_file(self, path, content):
+        fd, tmp_file = tempfile.mkstemp(dir=self.cache_dir)
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                f.write(content)
+            os.rename(tmp_file, path)
+        except:
+            os.remove(tmp_file)
+            raise
+
+
+URL_CACHE = None
+if os.environ.get('COMPLIANCELIB_CACHE_DIR'):
+    URL_CACHE = URLCache(os.environ['COMPLIANCELIB_CACHE_DIR'],
+        offline=os.environ.get('COMPLIANCELIB_OFFLINE', '') not in ('', '0'))
+
+def get_url_cache():
+    "get the URL cache shared by OpenControlFiles and SystemCompliance, or None"
+    return URL_CACHE
+
+def set_url_cache(cache):
+    "set the URL cache shared by OpenControlFiles and SystemCompliance, None turns caching off"
+    global URL_CACHE
+    URL_CACHE = cache
+
+def fetch_url(url):
+    "return the content of a URL, through the shared URL cache when one is set"
+    # files of repo archives are already in memory
+    if urlparse(url).scheme == 'archive':
+        return read_archive_url(url)
+    if URL_CACHE is not None:
+        return URL_CACHE.fetch(url)
+    if urlparse(url).scheme in ('http', 'https'):
+        response = get_transport().get(url)
+        raise_for_status(response)
+        return response.body
+    return urlopen(url).read()
+
+def fetch_url_if_modified(url, validators=None):
+    "return (content, validators) of a URL, content is None when the server reports it unchanged since validators"
+    # the shared URL cache revalidates by itself, other schemes have no validators
+    if URL_CACHE is not None or urlparse(url).scheme not in ('http', 'https'):
+        return fetch_url(url), {}
+    headers = {}
+    if validators and validators.get('etag'):
+        headers['If-None-Match'] = validators['etag']
+    if validators and validators.get('last_modified'):
+        headers['If-Modified-Since'] = validators['last_modified']
+    response = get_transport().get(url, headers)
+    if response.status == 304 and headers:
+        return None, validators
+    raise_for_status(response)
+    return response.body, {'etag': response.headers.get('etag'), 'last_modified': response.headers.get('last-modified')}
@@ -0,0 +1,118 @@
+#!/usr/bin/python
+# -*- coding: utf-8 -*-
+"""Load and dump YAML with libyaml when available
+
+Uses the libyaml based CSafeLoader and CSafeDumper of PyYAML when it was
+built with libyaml, falling back to the pure python SafeLoader and
+SafeDumper otherwise. Both only construct and represent standard YAML
+tags, as yaml.safe_load and yaml.safe_dump do.
+
+Parsed OpenControl files are cached process-wide by the hash of their
+content, so identical component files loaded by many SystemCompliance
+objects are parsed once. Each load gets its own dictionaries and lists
+sharing only the immutable strings and numbers, so changes made by one
+system never show up in another.
+
+Example python CLI
+------------------
+
+from compliancelib.yamlio import load_yaml, dump_yaml, LIBYAML
+component = load_yaml(open('compliancelib/data/UAA_component.yaml').read())
+print(dump_yaml(component, default_flow_style=False))
+
+LICENSE
+
+ComplianceLib yamlio loads and dumps OpenControl and 800-53 YAML
+Copyright (C) 2017  GovReady PBC.
+
+This program is free software: you can redistribute it and/or modify
+it under the terms of the GNU General Public License as published by
+the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+
+This program is distributed in the hope that it will be useful,
+but WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+GNU General Public License for more details.
+
+You should have received a copy of the GNU General Public License
+along with this program.  If not, see <http://www.gnu.org/licenses/>.
+"""
+
+__author__ = "Greg Elin (gregelin@govready.com)"
+__version__ = "$Revision: 0.1.0 $"
+__date__ = "$Date: 2017/05/20 10:00:00 $"
+__copyright__ = "Copyright (c) 2017 GovReady PBC"
+__license__ = "GNU General Public License v3 (GPLv3)"
+
+import hashlib
+import threading
+import yaml
+from collections import OrderedDict
+
+try:
+    from yaml import CSafeLoader as SafeLoader, CSafeDumper as SafeDumper
+    LIBYAML = True
+except ImportError:
+    from yaml import SafeLoader, SafeDumper
+    LIBYAML = False
+
+def load_yaml(stream, loader=None):
+    "parse a YAML document from a string, bytes or file, like yaml.safe_load"
+    return yaml.load(stream, Loader=loader or SafeLoader)
+
+def dump_yaml(data, stream=None, dumper=None, **kwds):
+    "serialize data to YAML, like yaml.safe_dump"
+    return yaml.dump_all([data], stream, Dumper=dumper or SafeDumper, **kwds)
+
+# Parsed documents by sha1 of their content, least recently used first.
+PARSED_CACHE = OrderedDict()
+PARSED_CACHE_SIZE = 1024
+PARSED_CACHE_LOCK = threading.Lock()
+PARSED_CACHE_STATS = {'hits': 0, 'misses': 0}
+
+def load_yaml_cached(content):
+    "parse a YAML document once per content, returning a private copy of the parsed structure"
+    if not isinstance(content, bytes):
+        content = content.encode('utf-8')
+    # line endings do not change the parsed document
+    key = hashlib.sha1(content.replace(b'\r\n', b'\n')).hexdigest()
+    with PARSED_CACHE_LOCK:
+        if key in PARSED_CACHE:
+            PARSED_CACHE_STATS['hits'] += 1
+            data = PARSED_CACHE.pop(key)
+            PARSED_CACHE[key] = data
+            return _copy_containers(data)
+        PARSED_CACHE_STATS['misses'] += 1
+    # parse outside the lock, concurrent loads of new content may both parse it
+    data = load_yaml(content)
+    with PARSED_CACHE_LOCK:
+        data = PARSED_CACHE.setdefault(key, data)
+        while len(PARSED_CACHE) > PARSED_CACHE_SIZE:
+            PARSED_CACHE.popitem(last=False)
+    return _copy_containers(data)
+
+def _copy_containers(data):
+    "copy the dictionaries, lists and sets of a parsed document, sharing its immutable values"
+    if isinstance(data, dict):
+        return dict((key, _copy_containers(value)) for key, value in data.items())
+    if isinstance(data, list):
+        return [_copy_containers(value) for value in data]
+    if isinstance(data, set):
+        return set(data)
+    # strings, numbers, booleans, None and dates
+    return data
+
+def parsed_cache_info():
+    "report hits, misses and size of the parsed document cache"
+    with PARSED_CACHE_LOCK:
+        return {"hits": PARSED_CACHE_STATS['hits'],
+            "misses": PARSED_CACHE_STATS['misses'],
+            "size": len(PARSED_CACHE),
+            "maxsize": PARSED_CACHE_SIZE}
+
+def clear_parsed_cache():
+    "drop all parsed documents and reset the counters"
+    with PARSED_CACHE_LOCK:
+        PARSED_CACHE.clear()
+        PARSED_CACHE_STATS['hits'] = PARSED_CACHE_STATS['misses'] = 0
@@ -1,9 +1,42 @@
+import os
+import sys
 from setuptools import setup
+from setuptools.command.build_py import build_py
+from setuptools.command.sdist import sdist
 
 def readme():
     with open('README.rst') as f:
         return f.read()
 
+def compile_catalog_caches(package_dir):
+    "compile the 800-53 xml files into the catalog caches of a copy of the compliancelib package"
+    # same as tools/build_catalog_cache.py, writing into package_dir instead of the source tree
+    sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+    try:
+        from compliancelib import nist800_53
+    except ImportError as e:
+        print("warning: not compiling 800-53 catalog caches, %s" % e)
+        return
+    finally:
+        sys.path.pop(0)
+    for revision in [None] + list(nist800_53.REVISIONS):
+        cache_file = os.path.basename(nist800_53._catalog_cache_file(nist800_53._catalog_xml_file(revision)))
+        print(nist800_53.NIST800_53.build_catalog_cache(os.path.join(package_dir, 'data', cache_file), revision))
+
+class build_py_with_catalog_cache(build_py):
+    "build the package with compiled 800-53 catalog caches"
+    def run(self):
+        build_py.run(self)
+        if not self.dry_run:
+            compile_catalog_caches(os.path.join(self.build_lib, 'compliancelib'))
+
+class sdist_with_catalog_cache(sdist):
+    "ship compiled 800-53 catalog caches in source distributions"
+    def make_release_tree(self, base_dir, files):
+        sdist.make_release_tree(self, base_dir, files)
+        if not self.dry_run:
+            compile_catalog_caches(os.path.join(base_dir, 'compliancelib'))
+
 setup(name='compliancelib',
       version='1.1.2',
       description='A python library for modeling IT Compliance',
@@ -35,7 +68,7 @@ setup(name='compliancelib',
       license='GNU General Public License v3 (GPLv3)',
       packages=['compliancelib'],
       package_data={
-      'compliancelib': ['data/*.xml', 'data/*.pdf', 'data/dependencies/*.txt'],
+      'compliancelib': ['data/*.xml', 'data/*.cache', 'data/*.pdf', 'data/dependencies/*.txt'],
       },
       include_package_data=True,
       install_requires=[
@@ -44,6 +77,7 @@ setup(name='compliancelib',
           'graphviz',
           'defusedxml'
       ],
+      cmdclass={'build_py': build_py_with_catalog_cache, 'sdist': sdist_with_catalog_cache},
       test_suite='nose.collector',
       tests_require=['nose'],
       zip_safe=False)
\ No newline at end of file
@@ -0,0 +1,41 @@
+# Compares parsing the bundled component YAML files and dumping 800-53
+# controls with the pure python SafeLoader/SafeDumper and the libyaml
+# CSafeLoader/CSafeDumper used by compliancelib.yamlio.
+#
+# usage: python tools/benchmark_yaml.py [repeat]
+
+import os
+import sys
+import glob
+import timeit
+import yaml
+
+import compliancelib
+from compliancelib.yamlio import load_yaml, dump_yaml, LIBYAML
+
+repeat = int(sys.argv[1]) if len(sys.argv) > 1 else 5
+package_dir = os.path.dirname(compliancelib.__file__)
+paths = sorted(glob.glob(os.path.join(package_dir, 'data', '*.yaml')) +
+    glob.glob(os.path.join(package_dir, 'tests', 'test_data', '*', '*', '*.yaml')))
+documents = [open(path).read() for path in paths]
+controls = [compliancelib.NIST800_53(control_id, lazy=True).json_dict
+    for control_id in compliancelib.NIST800_53.get_control_ids()]
+dump_options = dict(allow_unicode=True, default_flow_style=False, line_break="\n", indent=4)
+
+def best(function):
+    return min(timeit.repeat(function, number=1, repeat=repeat))
+
+if not LIBYAML:
+    print("PyYAML is not built with libyaml, compliancelib uses the pure python loader and dumper")
+
+print("load %d files (%d bytes)" % (len(documents), sum(len(document) for document in documents)))
+pure = best(lambda: [load_yaml(document, loader=yaml.SafeLoader) for document in documents])
+fast = best(lambda: [load_yaml(document) for document in documents])
+print("  SafeLoader   %8.1f ms" % (pure * 1000))
+print("  yamlio       %8.1f ms  (%.1fx)" % (fast * 1000, pure / fast))
+
+print("dump %d controls" % len(controls))
+pure = best(lambda: [dump_yaml(control, dumper=yaml.SafeDumper, **dump_options) for control in controls])
+fast = best(lambda: [dump_yaml(control, **dump_options) for control in controls])
+print("  SafeDumper   %8.1f ms" % (pure * 1000))
+print("  yamlio       %8.1f ms  (%.1fx)" % (fast * 1000, pure / fast))
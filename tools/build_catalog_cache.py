@@ -0,0 +1,12 @@
+# Compiles data/800-53-controls.xml and the dated 800-53 revisions into the
+# pre-extracted catalog caches loaded by compliancelib.NIST800_53 at startup.
+# setup.py build and sdist compile them into the built package; run this to
+# compile them into a development checkout.
+#
+# usage: python tools/build_catalog_cache.py
+
+import compliancelib
+from compliancelib.nist800_53 import REVISIONS
+
+for revision in [None] + list(REVISIONS):
+    print(compliancelib.NIST800_53.build_catalog_cache(revision=revision))
@@ -15,22 +15,15 @@ def make_resource_id(control_id):
 	x = "nist-800-53-control-" + x.lower()
 	return x
 
-ids = \
-	list(compliancelib.NIST800_53.get_control_ids()) \
-  + list(compliancelib.NIST800_53.get_control_enhancement_ids())
-
 resources = []
 
-for c in ids:
-	cc = compliancelib.NIST800_53(c)
-
-	is_enhancement = False
-	if "(" in c: # ha that's not great but OK
-		is_enhancement = True
-		parent_control = compliancelib.NIST800_53(c.rsplit(" (", 1)[0])
+# controls and control enhancements in a single pass over the catalog,
+# control enhancements carry the family and id of their parent control
+for cc in compliancelib.NIST800_53.iter_catalog():
+	is_enhancement = cc.parent is not None
 
 	res = OrderedDict([
-		("id", make_resource_id(c)),
+		("id", make_resource_id(cc.id)),
 		("type", "control"),
 		("enhancement", is_enhancement),
 		("generator", "compliancelib"),
@@ -39,14 +32,14 @@ for c in ids:
 		("alt-titles", [cc.number, cc.title]),
 		("short-title", cc.number),
 		("description", cc.description),
-		("family", cc.family if not is_enhancement else parent_control.family),
+		("family", cc.family),
 		("description", cc.description or ""), # must not be null
 		("supplemental-guidance", cc.supplemental_guidance),
 		("url", "http://800-53.govready.com/control?" + urlencode({ "id": cc.id })),
 	])
 
 	if is_enhancement:
-		res["parent-control"] = parent_control.id
+		res["parent-control"] = cc.parent
 
 	resources.append(res)
 
@@ -0,0 +1,28 @@
+# Renders the system security plans of many systems in parallel, one
+# process per core, and prints the time spent on each system.
+#
+# usage: python tools/render_ssps.py OUTPUT_DIR REPO [REPO ...]
+#   REPO is a local OpenControl repo directory, a tar or zip archive of one, or a repo url
+#   set SSP_FORMAT (text, json, yaml) and SSP_BASELINE (LOW, MODERATE, HIGH) to choose the output
+
+import os
+import sys
+import time
+
+from compliancelib.sspbatch import render_ssps
+
+if len(sys.argv) < 3:
+    print("usage: python tools/render_ssps.py OUTPUT_DIR REPO [REPO ...]")
+    sys.exit(1)
+
+start = time.time()
+results = render_ssps(sys.argv[2:], sys.argv[1], format=os.environ.get('SSP_FORMAT', 'text'),
+    baseline=os.environ.get('SSP_BASELINE'))
+for result in results:
+    if result['error']:
+        print("%-40s FAILED after %.2fs\n%s" % (result['source'], result['seconds'], result['error']))
+    else:
+        print("%-40s %4d controls  load %.2fs  render %.2fs  -> %s" % (result['source'], result['controls'],
+            result['load_seconds'], result['render_seconds'], result['output']))
+print("%d systems in %.2fs" % (len(results), time.time() - start))
+sys.exit(1 if any(result['error'] for result in results) else 0)